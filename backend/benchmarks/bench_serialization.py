@@ -0,0 +1,73 @@
+"""
+Vergleicht die CPU-Zeit pro Antwort für Rezeptseiten mit 10/50/100 Rezepten:
+
+- "response_model": FastAPIs Standardpfad (Validierung gegen List[Recipe],
+  Serialisierung über das Modell, JSONResponse mit json.dumps)
+- "fast_json": fast_json.recipes_response (Ausgabeform des Recipe-Modells ohne
+  erneute Validierung, orjson statt jsonable_encoder)
+
+    cd backend && python benchmarks/bench_serialization.py [--rounds 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+import fast_json
+import recipe_documents
+from benchmarks import synthetic
+from models import Recipe
+
+PAGE_SIZES = (10, 50, 100)
+
+
+def prepared_page(size: int) -> List[dict]:
+    return [
+        recipe_documents.prepare_for_response({"_id": ObjectId(), **synthetic.make_recipe(i)})
+        for i in range(size)
+    ]
+
+
+async def response_model_path(field, docs: List[dict]) -> bytes:
+    content = await serialize_response(field=field, response_content=docs)
+    return JSONResponse(content).body
+
+
+async def fast_json_path(docs: List[dict]) -> bytes:
+    return fast_json.recipes_response(docs).body
+
+
+async def measure(path, rounds: int, size: int) -> float:
+    """CPU-Zeit pro Antwort in Millisekunden."""
+    pages = [prepared_page(size) for _ in range(rounds)]
+    start = time.process_time()
+    for docs in pages:
+        await path(docs)
+    return (time.process_time() - start) / rounds * 1000
+
+
+async def main(rounds: int) -> None:
+    field = create_model_field(name="Response_get_recipes", type_=List[Recipe], mode="serialization")
+
+    print(f"{'page':>6} {'response_model':>16} {'fast_json':>12} {'saved':>10} {'speedup':>8}")
+    for size in PAGE_SIZES:
+        default_ms = await measure(lambda docs: response_model_path(field, docs), rounds, size)
+        fast_ms = await measure(fast_json_path, rounds, size)
+        print(f"{size:>6} {default_ms:>13.3f} ms {fast_ms:>9.3f} ms "
+              f"{default_ms - fast_ms:>7.3f} ms {default_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200, help="Antworten pro Messung")
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds))
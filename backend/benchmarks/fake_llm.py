@@ -0,0 +1,70 @@
+"""
+Ersatz für `llm_service.llm`, der ohne Azure OpenAI plausible Antworten mit
+konfigurierbarer Latenz liefert.
+"""
+import asyncio
+import json
+import random
+from typing import Any, AsyncIterator, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from benchmarks.synthetic import DISHES, INGREDIENTS
+
+
+class FakeChatModel:
+    """
+    Answers the prompts of llm_service (recipe titles, recipe details,
+    ingredient detection) after `latency` ± `jitter` seconds.
+    """
+
+    def __init__(self, latency: float = 1.0, jitter: float = 0.2, chunks: int = 40, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunks = chunks
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def _delay(self) -> float:
+        return max(0.0, self._rng.uniform(self.latency - self.jitter, self.latency + self.jitter))
+
+    def _answer(self, messages: List[Any]) -> str:
+        content = messages[-1].content
+        if isinstance(content, list):
+            # Bildanalyse (Zutatenerkennung)
+            names = self._rng.sample(INGREDIENTS, 6)
+            return json.dumps([{"name": name, "amount": "1", "unit": "piece"} for name in names])
+        if "recipe titles" in content:
+            return json.dumps([f"{self._rng.choice(INGREDIENTS).title()} {dish}" for dish in self._rng.sample(DISHES, 5)])
+        return json.dumps({
+            "title": "Benchmark Recipe",
+            "description": "A synthetic recipe for load tests",
+            "prepTime": "15",
+            "cookTime": "30",
+            "servings": "4",
+            "ingredients": [{"name": name, "measure": "100 g"} for name in self._rng.sample(INGREDIENTS, 8)],
+            "instructions": [f"Step {n + 1}: stir and simmer" for n in range(8)],
+            "tips": "None",
+        })
+
+    @staticmethod
+    def _usage(messages: List[Any], answer: str) -> dict:
+        # Grobe Schätzung: vier Zeichen pro Token
+        prompt = sum(len(str(message.content)) for message in messages)
+        return {"input_tokens": prompt // 4, "output_tokens": len(answer) // 4, "total_tokens": (prompt + len(answer)) // 4}
+
+    async def ainvoke(self, messages: List[Any], **kwargs) -> AIMessage:
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        answer = self._answer(messages)
+        return AIMessage(content=answer, usage_metadata=self._usage(messages, answer))
+
+    async def astream(self, messages: List[Any], **kwargs) -> AsyncIterator[AIMessageChunk]:
+        self.calls += 1
+        answer = self._answer(messages)
+        size = max(1, len(answer) // self.chunks)
+        pause = self._delay() / self.chunks
+        for start in range(0, len(answer), size):
+            await asyncio.sleep(pause)
+            yield AIMessageChunk(content=answer[start:start + size])
+        yield AIMessageChunk(content="", usage_metadata=self._usage(messages, answer))
@@ -0,0 +1,220 @@
+"""
+Lasttest der Rezept-API mit synthetischen Rezepten und einem Fake-LLM.
+
+Die App läuft im selben Prozess (ASGI, ohne Netzwerk); MongoDB ist entweder
+ein lokaler mongod oder mit `--mongodb-url memory` ein In-Memory-Ersatz
+(mongomock-motor, unterstützt nicht alle Aggregationen). Pro Szenario werden
+p50/p95/p99-Latenz und Durchsatz ausgegeben.
+
+    cd backend
+    python benchmarks/load_test.py --recipes 10000 --seed-data
+    python benchmarks/load_test.py --concurrency 32 --requests 1000 --output results.json
+    python benchmarks/load_test.py --baseline results.json --max-regression 0.2
+
+Mit `--baseline` endet das Skript mit Exit-Code 1, wenn die p95-Latenz eines
+Szenarios um mehr als `--max-regression` (Anteil) schlechter ist.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Ein Request: (Methode, URL, JSON-Body oder None)
+RequestSpec = Tuple[str, str, Any]
+
+SEARCH_TERMS = ["chicken", "curry", "italian", "soup", "garlic", "seafood", "pie", "rice"]
+
+
+def configure_environment(args) -> None:
+    """
+    Settings for the app under test; must run before main/llm_service are imported.
+    """
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DB_NAME"] = args.db_name
+    # llm_service verlangt Azure-Zugangsdaten beim Import; das Modell wird danach ersetzt
+    for name in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_DEPLOYMENT"):
+        os.environ.setdefault(name, "benchmark" if name != "AZURE_OPENAI_ENDPOINT" else "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2024-10-21")
+    os.environ["LLM_CACHE_ENABLED"] = "true" if args.llm_cache else "false"
+    # Gespeicherte generierte Rezepte würden das LLM ebenfalls umgehen
+    os.environ["GENERATED_RECIPES_ENABLED"] = "true" if args.llm_cache else "false"
+    # Sonst beantwortet der Zutatenabgleich generate_list/generate_details aus der Datenbank
+    os.environ["MATCH_ENABLED"] = "false"
+    os.environ["LLM_CACHE_MONGO"] = "false"
+    os.environ["INDEX_EXPLAIN_ON_STARTUP"] = "false"
+
+
+def scenarios(recipe_ids: List[str], rng: random.Random) -> Dict[str, Callable[[], RequestSpec]]:
+    from benchmarks.synthetic import INGREDIENTS
+
+    def ingredients(count: int) -> List[Dict[str, str]]:
+        return [{"name": name} for name in rng.sample(INGREDIENTS, count)]
+
+    return {
+        "recipes": lambda: ("GET", f"/recipes?limit=20&skip={rng.randrange(0, 200)}", None),
+        "recipes_search": lambda: ("GET", f"/recipes?limit=20&search={rng.choice(SEARCH_TERMS)}", None),
+        "search": lambda: ("GET", f"/search?q={rng.choice(SEARCH_TERMS)}&limit=20", None),
+        "random": lambda: ("GET", "/recipes/random?limit=5", None),
+        "recipe": lambda: ("GET", f"/recipes/{rng.choice(recipe_ids)}", None),
+        "generate_list": lambda: ("POST", "/recipes/generate/list", ingredients(4)),
+        "generate_details": lambda: ("POST", "/recipes/generate/details", {
+            "recipe_title": f"Benchmark {rng.randrange(1000)}",
+            "ingredients": ingredients(5),
+        }),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, make_request: Callable[[], RequestSpec],
+                       total: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Sends `total` requests with `concurrency` workers and summarizes the latencies.
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, body = make_request()
+            started_at = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            max_regression: float) -> List[str]:
+    """
+    Returns the scenarios whose p95 latency regressed beyond `max_regression`.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and previous["p95_ms"] and result["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f} ms -> {result['p95_ms']:.1f} ms")
+    return regressions
+
+
+def use_memory_mongo() -> None:
+    """
+    Replaces the MongoDB client with mongomock-motor (pip install mongomock-motor).
+    """
+    from mongomock_motor import AsyncMongoMockClient
+
+    import database
+
+    client = AsyncMongoMockClient()
+    database.create_client = lambda url, listeners=(), **overrides: client
+
+
+async def main(args) -> int:
+    import httpx
+
+    from benchmarks import synthetic
+    from benchmarks.fake_llm import FakeChatModel
+
+    if args.mongodb_url == "memory":
+        use_memory_mongo()
+
+    import llm_service
+    import main as api
+
+    llm_service.llm = FakeChatModel(latency=args.llm_latency, jitter=args.llm_jitter)
+
+    await api.startup_db_client()
+    try:
+        recipes = api.app.mongodb["recipes"]
+        if args.seed_data or args.mongodb_url == "memory" or await recipes.estimated_document_count() == 0:
+            await synthetic.seed(recipes, args.recipes)
+            # Indexe und Dienste auf die neuen Daten einstellen
+            await api.shutdown_db_client()
+            await api.startup_db_client()
+            recipes = api.app.mongodb["recipes"]
+
+        recipe_ids = [str(doc["_id"]) async for doc in recipes.find({}, {"_id": 1}).limit(10000)]
+        rng = random.Random(args.seed)
+        available = scenarios(recipe_ids, rng)
+        selected = args.scenarios.split(",") if args.scenarios else list(available)
+
+        transport = httpx.ASGITransport(app=api.app)
+        results: Dict[str, Dict[str, Any]] = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            print(f"{'scenario':<18} {'requests':>8} {'errors':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8}")
+            for name in selected:
+                requests = args.llm_requests if name.startswith("generate") else args.requests
+                result = await run_scenario(client, available[name], requests, args.concurrency)
+                results[name] = result
+                print(f"{name:<18} {result['requests']:>8} {result['errors']:>6} "
+                      f"{result['p50_ms']:>6.1f} ms {result['p95_ms']:>6.1f} ms {result['p99_ms']:>6.1f} ms "
+                      f"{result['throughput_rps']:>8.1f}")
+    finally:
+        await api.shutdown_db_client()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"Regression: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCHMARK_MONGODB_URL", "mongodb://localhost:27017"),
+                        help='mongod-URL oder "memory" für mongomock-motor')
+    parser.add_argument("--db-name", default="mealmate_benchmark")
+    parser.add_argument("--recipes", type=int, default=10000, help="Anzahl synthetischer Rezepte (10k bis 1M)")
+    parser.add_argument("--seed-data", action="store_true", help="Collection neu befüllen")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Requests pro Szenario")
+    parser.add_argument("--llm-requests", type=int, default=100, help="Requests pro Generierungs-Szenario")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Mittlere Latenz des Fake-LLM (Sekunden)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--llm-cache", action="store_true", help="LLM-Antwort-Cache aktiv lassen")
+    parser.add_argument("--scenarios", help="Kommagetrennte Auswahl, z.B. recipes,search")
+    parser.add_argument("--seed", type=int, default=1, help="Zufalls-Seed der Requests")
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--baseline", help="JSON-Ergebnisse eines früheren Laufs zum Vergleich")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    configure_environment(args)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,62 @@
+"""
+Synthetische Rezeptdokumente (Form wie RecipeBase) für Benchmarks.
+"""
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import recipe_documents
+
+CATEGORIES = ["Beef", "Chicken", "Dessert", "Lamb", "Pasta", "Pork", "Seafood", "Side", "Starter", "Vegan", "Vegetarian"]
+AREAS = ["American", "British", "Chinese", "French", "Greek", "Indian", "Italian", "Japanese", "Mexican", "Thai"]
+INGREDIENTS = [
+    "chicken", "beef", "pork", "salmon", "prawns", "tofu", "rice", "pasta", "potatoes", "onion",
+    "garlic", "tomatoes", "carrots", "peppers", "mushrooms", "spinach", "cheese", "butter", "milk",
+    "eggs", "flour", "lemon", "ginger", "chili", "coconut milk", "beans", "lentils", "basil",
+]
+DISHES = ["Curry", "Stew", "Pie", "Salad", "Soup", "Risotto", "Stir Fry", "Bake", "Tacos", "Casserole"]
+TAGS = ["Dinner", "Quick", "Spicy", "Comfort", "Healthy", "Party", "Baking", "Summer"]
+
+
+def make_recipe(i: int, rng: Optional[random.Random] = None) -> Dict[str, Any]:
+    """
+    Builds one recipe document as it is stored in MongoDB (already normalized).
+    """
+    rng = rng or random.Random(i)
+    ingredients = rng.sample(INGREDIENTS, rng.randint(5, 14))
+    recipe = {
+        "idMeal": str(100000 + i),
+        "title": f"{rng.choice(AREAS)} {ingredients[0].title()} {rng.choice(DISHES)} {i}",
+        "category": rng.choice(CATEGORIES),
+        "area": rng.choice(AREAS),
+        "image": f"https://www.themealdb.com/images/media/meals/synthetic-{i}.jpg",
+        "youtube": f"https://www.youtube.com/watch?v=synthetic{i}" if rng.random() < 0.7 else None,
+        "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        "cookingTime": f"{rng.randrange(10, 180, 5)} Min",
+        "servings": f"{rng.randint(1, 8)} servings",
+        "highlight": rng.random() < 0.01,
+        "created_at": datetime.now(),
+        "ingredients": [
+            {"name": name, "measure": f"{rng.randint(1, 500)} g"} for name in ingredients
+        ],
+        "instructions": [
+            f"Step {n + 1}: " + " ".join(rng.choices(["stir", "simmer", "chop", "season", "bake", "fry"], k=12))
+            for n in range(rng.randint(3, 10))
+        ],
+    }
+    return recipe_documents.normalize_for_storage(recipe)
+
+
+def make_recipes(count: int, start: int = 0, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed + start)
+    return [make_recipe(start + i, rng) for i in range(count)]
+
+
+async def seed(collection, count: int, batch_size: int = 5000, seed: int = 42) -> None:
+    """
+    Replaces the contents of `collection` with `count` synthetic recipes.
+    """
+    await collection.delete_many({})
+    for start in range(0, count, batch_size):
+        await collection.insert_many(make_recipes(min(batch_size, count - start), start, seed), ordered=False)
+        print(f"Seeded {min(start + batch_size, count)}/{count} recipes")
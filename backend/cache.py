@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+# Standardwerte für den Antwort-Cache der LLM-Generierungen
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+CACHE_MONGO_ENABLED = os.getenv("LLM_CACHE_MONGO", "true").lower() == "true"
+CACHE_COLLECTION = os.getenv("LLM_CACHE_COLLECTION", "llm_cache")
+
+
+def normalize_ingredient_name(name: Any) -> str:
+    """
+    Normalizes an ingredient name for comparisons and cache keys.
+
+    Case-folds the name and collapses whitespace, so "  Cheddar  Cheese" and
+    "cheddar cheese" end up identical.
+    """
+    return " ".join(str(name).casefold().split())
+
+
+def canonical_ingredients(ingredients: Iterable[Any]) -> List[str]:
+    """
+    Returns the order-independent, de-duplicated form of an ingredient list.
+    """
+    return sorted({normalize_ingredient_name(i) for i in ingredients if normalize_ingredient_name(i)})
+
+
+def make_key(namespace: str, **parts: Any) -> str:
+    """
+    Builds a stable cache key from a namespace and JSON-serializable parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def recipe_list_key(ingredients: Iterable[Any]) -> str:
+    """Cache key for `generate_recipes`."""
+    return make_key("recipes", ingredients=canonical_ingredients(ingredients))
+
+
+def recipe_details_key(recipe_title: str, ingredients: Iterable[Any]) -> str:
+    """Cache key for `generate_recipe_details`."""
+    return make_key(
+        "details",
+        title=normalize_ingredient_name(recipe_title),
+        ingredients=canonical_ingredients(ingredients),
+    )
+
+
+def generation_key(recipe_title: str, ingredients: Iterable[Any]) -> str:
+    """Key of a stored generated recipe (see generated_recipes.py)."""
+    return make_key(
+        "generated",
+        title=normalize_ingredient_name(recipe_title),
+        ingredients=canonical_ingredients(ingredients),
+    )
+
+
+class CacheBackend:
+    """
+    Interface for a cache tier. Values must be JSON-serializable.
+    """
+
+    name = "backend"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with a per-entry time to live.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MongoCache(CacheBackend):
+    """
+    Shared cache tier in a MongoDB collection.
+
+    Expired documents are removed by a TTL index on `expiresAt`; reads also
+    check the expiry because the TTL monitor only runs periodically.
+    Errors are logged and treated as misses so the cache never breaks a request.
+    """
+
+    name = "mongo"
+
+    def __init__(self, collection, ttl: int = CACHE_TTL_SECONDS):
+        self.collection = collection
+        self.ttl = ttl
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expiresAt", expireAfterSeconds=0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            doc = await self.collection.find_one({"_id": key})
+        except Exception as e:
+            print(f"Warning: cache lookup failed: {e}")
+            return None
+        if not doc:
+            return None
+        expires_at = doc.get("expiresAt")
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                return None
+        return json.loads(doc["value"])
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl if ttl is not None else self.ttl)
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "value": json.dumps(value), "expiresAt": expires_at},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"Warning: cache write failed: {e}")
+
+
+class TieredCache:
+    """
+    Looks up a key tier by tier (fastest first) and back-fills faster tiers
+    on a hit in a slower one. Hits are counted per tier.
+    """
+
+    def __init__(self, tiers: Optional[List[CacheBackend]] = None, enabled: bool = CACHE_ENABLED):
+        self.tiers: List[CacheBackend] = list(tiers or [])
+        self.enabled = enabled
+        self.hits: Dict[str, int] = {tier.name: 0 for tier in self.tiers}
+        self.misses = 0
+
+    def add_tier(self, tier: CacheBackend) -> None:
+        self.tiers.append(tier)
+        self.hits.setdefault(tier.name, 0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        for index, tier in enumerate(self.tiers):
+            value = await tier.get(key)
+            if value is not None:
+                self.hits[tier.name] = self.hits.get(tier.name, 0) + 1
+                for faster in self.tiers[:index]:
+                    await faster.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        for tier in self.tiers:
+            await tier.set(key, value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        total_hits = sum(self.hits.values())
+        lookups = total_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "tiers": [tier.name for tier in self.tiers],
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": total_hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,159 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+# Verbindungspool des MongoDB-Clients (pro Server des Replica Sets)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0"))
+# Maximale Wartezeit auf eine freie Verbindung (0 = unbegrenzt)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+# Kompression der Verbindung, z.B. "zstd,snappy" (leer = keine); snappy benötigt python-snappy
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+# Read Preference der lesenden Rezept-Endpunkte (Schreibzugriffe gehen immer an den Primary)
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# Maximal tolerierte Verzögerung eines Secondaries (-1 = keine Grenze, sonst mind. 90)
+MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "-1"))
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primarypreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondarypreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def client_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for the MongoDB client built from the MONGO_* settings.
+    """
+    options: Dict[str, Any] = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = MONGO_MAX_IDLE_TIME_MS
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+    compressors = [name.strip() for name in MONGO_COMPRESSORS.split(",") if name.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def read_preference():
+    """
+    Read preference for the read-only recipe endpoints.
+
+    Raises:
+        ValueError: If MONGO_READ_PREFERENCE is not a known mode
+    """
+    mode = READ_PREFERENCES.get(MONGO_READ_PREFERENCE.lower())
+    if mode is None:
+        raise ValueError(f"Unknown MONGO_READ_PREFERENCE: {MONGO_READ_PREFERENCE}")
+    if mode is Primary:
+        return Primary()
+    return mode(max_staleness=MONGO_MAX_STALENESS_SECONDS)
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool utilization per server, collected from the driver's
+    connection monitoring events.
+
+    The listener is called from the driver's threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+
+    def _count(self, address, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._servers[f"{address[0]}:{address[1]}"][key] += amount
+
+    def pool_created(self, event):
+        self._count(event.address, "pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count(event.address, "pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count(event.address, "open")
+        self._count(event.address, "created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count(event.address, "open", -1)
+
+    def connection_check_out_started(self, event):
+        self._count(event.address, "waiting")
+
+    def connection_check_out_failed(self, event):
+        self._count(event.address, "waiting", -1)
+        self._count(event.address, "checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._count(event.address, "waiting", -1)
+        self._count(event.address, "in_use")
+        self._count(event.address, "checkouts")
+        # Wartezeit auf die Verbindung (seit pymongo 4.7)
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            self._count(event.address, "checkout_seconds", duration)
+
+    def connection_checked_in(self, event):
+        self._count(event.address, "in_use", -1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            servers = {address: dict(counts) for address, counts in self._servers.items()}
+        for counts in servers.values():
+            checkouts = counts.get("checkouts", 0)
+            counts["avg_checkout_ms"] = (
+                round(counts.pop("checkout_seconds", 0) / checkouts * 1000, 3) if checkouts else None
+            )
+            counts["utilization"] = round(counts.get("in_use", 0) / MONGO_MAX_POOL_SIZE, 3) if MONGO_MAX_POOL_SIZE else None
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "read_preference": MONGO_READ_PREFERENCE,
+            "compressors": client_options().get("compressors", []),
+            "servers": servers,
+        }
+
+
+pool_stats = PoolStats()
+
+
+def create_client(url: str, listeners: Sequence[Any] = (), **overrides: Any) -> AsyncIOMotorClient:
+    """
+    Creates the MongoDB client with the configured pool options, the pool
+    monitoring listener and additional event `listeners`.
+    """
+    options = {**client_options(), **overrides}
+    return AsyncIOMotorClient(url, event_listeners=[pool_stats, *listeners], **options)
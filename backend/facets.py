@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import http_cache
+
+# Lebensdauer der zwischengespeicherten Facetten und max-age für Clients (Sekunden)
+FACET_TTL_SECONDS = int(os.getenv("FACET_TTL_SECONDS", "300"))
+FACET_MAX_AGE = int(os.getenv("FACET_MAX_AGE", "60"))
+
+
+class FacetSnapshot:
+    """
+    Values of one facet with per-value recipe counts, pre-serialized for the
+    response.
+    """
+
+    def __init__(self, key: str, counts: Dict[str, int]):
+        self.values: List[str] = list(counts)
+        self.counts = counts
+        self.body = http_cache.json_body({key: self.values, "counts": counts})
+        self.etag = http_cache.etag_for(self.body)
+        self.created_at = time.monotonic()
+
+
+class FacetService:
+    """
+    Keeps the distinct values of recipe fields (e.g. category, area) with
+    their recipe counts in memory.
+
+    The first request per field computes its snapshot with one `$group`
+    aggregation. After FACET_TTL_SECONDS the stale snapshot is still served
+    while a background task recomputes it; freshness is TTL-only. Categories and areas are only
+    written outside the API (import/migration scripts), and generated
+    recipes have neither, so no in-process write changes the counts.
+    """
+
+    def __init__(self, ttl: int = FACET_TTL_SECONDS):
+        self.ttl = ttl
+        self.collection = None
+        self._snapshots: Dict[str, FacetSnapshot] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def attach(self, collection) -> None:
+        self.collection = collection
+        self._snapshots.clear()
+
+    def _fresh(self, snapshot: Optional[FacetSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.created_at < self.ttl
+
+    async def refresh(self, field: str, key: str) -> FacetSnapshot:
+        pipeline = [
+            {"$match": {field: {"$nin": [None, ""]}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ]
+        groups = await self.collection.aggregate(pipeline).to_list(None)
+        snapshot = FacetSnapshot(key, {str(group["_id"]): group["count"] for group in groups})
+        self._snapshots[field] = snapshot
+        self.refreshes += 1
+        return snapshot
+
+    async def _refresh_locked(self, field: str, key: str) -> FacetSnapshot:
+        async with self._locks.setdefault(field, asyncio.Lock()):
+            # Ein anderer Request hat den Snapshot inzwischen neu berechnet
+            snapshot = self._snapshots.get(field)
+            if self._fresh(snapshot):
+                return snapshot
+            return await self.refresh(field, key)
+
+    async def _background_refresh(self, field: str, key: str) -> None:
+        try:
+            await self._refresh_locked(field, key)
+        except Exception as e:
+            self.errors += 1
+            print(f"Warning: facet refresh for {field} failed: {e}")
+
+    async def get(self, field: str, key: str) -> FacetSnapshot:
+        """
+        Returns the snapshot for `field`; `key` is the name of the value list
+        in the response body (e.g. "categories").
+        """
+        snapshot = self._snapshots.get(field)
+        if snapshot is None:
+            # Noch kein Snapshot: einmalig im Request berechnen
+            return await self._refresh_locked(field, key)
+
+        if self._fresh(snapshot):
+            self.hits += 1
+            return snapshot
+
+        # Veralteten Snapshot ausliefern und im Hintergrund neu berechnen
+        self.stale_hits += 1
+        task = self._refresh_tasks.get(field)
+        if task is None or task.done():
+            self._refresh_tasks[field] = asyncio.create_task(self._background_refresh(field, key))
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "cached": sorted(self._snapshots),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+
+facet_service = FacetService()
@@ -0,0 +1,223 @@
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+from pymongo.errors import DuplicateKeyError
+
+import cache
+import llm_service
+import recipe_documents
+from models import RecipeCreate
+
+# Generierte Rezepte in der Rezept-Collection speichern und wiederverwenden
+GENERATED_RECIPES_ENABLED = os.getenv("GENERATED_RECIPES_ENABLED", "true").lower() == "true"
+
+# Felder der LLM-Antwort, die RecipeBase nicht abbildet; sie werden gespeichert,
+# damit ein wiederverwendetes Rezept dieselbe Antwort liefert wie das LLM
+DETAIL_FIELDS = ("description", "prepTime", "cookTime", "servings", "tips")
+
+
+def is_complete(details: Dict[str, Any]) -> bool:
+    """Whether generated details are worth storing (parsed, with ingredients and steps)."""
+    if "error" in details or details.get("fallback"):
+        return False
+    return bool(details.get("ingredients")) and bool(details.get("instructions"))
+
+
+def to_document(recipe_title: str, ingredients: List[str], details: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts generated details into a recipe document (shape of RecipeBase)
+    flagged with `generated` and keyed by `generationKey`.
+
+    Raises:
+        ValidationError: If the details do not fit the recipe model
+    """
+    prep_minutes = recipe_documents.parse_minutes(details.get("prepTime"))
+    cook_minutes = recipe_documents.parse_minutes(details.get("cookTime"))
+    total_minutes = None
+    if prep_minutes is not None or cook_minutes is not None:
+        total_minutes = (prep_minutes or 0) + (cook_minutes or 0)
+    servings = recipe_documents.parse_servings(details.get("servings"))
+
+    recipe = {
+        "title": str(details.get("title") or recipe_title),
+        "instructions": [str(step) for step in details.get("instructions") or []],
+        "ingredients": [
+            {"name": str(item["name"]), "measure": str(item.get("measure") or "")}
+            for item in details.get("ingredients") or []
+            if isinstance(item, dict) and item.get("name")
+        ],
+        "cookingTime": f"{total_minutes} Min" if total_minutes is not None else None,
+        "servings": f"{servings} servings" if servings is not None else None,
+        "tags": ["Generated"],
+    }
+    # Prüft die Form gegen das Rezeptmodell, bevor etwas gespeichert wird
+    RecipeCreate(**recipe)
+
+    recipe.update({
+        "generated": True,
+        "generationKey": cache.generation_key(recipe_title, ingredients),
+        "generation": {
+            "title": recipe_title,
+            "ingredients": cache.canonical_ingredients(ingredients),
+            "details": {field: details[field] for field in DETAIL_FIELDS if field in details},
+        },
+        "created_at": datetime.now(timezone.utc),
+    })
+    return recipe_documents.normalize_for_storage(recipe)
+
+
+def to_details(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuilds the /recipes/generate/details response from a stored document.
+    """
+    extra = (doc.get("generation") or {}).get("details") or {}
+    details = {"title": doc["title"]}
+    for field in ("description", "prepTime", "cookTime", "servings"):
+        if field in extra:
+            details[field] = extra[field]
+    details["ingredients"] = doc.get("ingredients") or []
+    details["instructions"] = doc.get("instructions") or []
+    if "tips" in extra:
+        details["tips"] = extra["tips"]
+    # Verweis auf das gespeicherte Rezept (/recipes/{recipe_id})
+    details["recipeId"] = str(doc["_id"])
+    return details
+
+
+class GeneratedRecipeStore:
+    """
+    Generated recipes in the recipes collection.
+
+    Each generation (normalized title + ingredient set) is stored once,
+    guarded by the unique partial index on `generationKey` (see indexes.py),
+    and later requests for the same generation are answered from MongoDB
+    instead of the LLM.
+    """
+
+    def __init__(self, enabled: bool = GENERATED_RECIPES_ENABLED):
+        self.enabled = enabled
+        self.collection = None
+        self.lookups = 0
+        self.hits = 0
+        self.saved = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def attach(self, collection) -> None:
+        self.collection = collection
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.collection is not None
+
+    async def lookup(self, recipe_title: str, ingredients: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored details for this generation, or None.
+        """
+        if not self.active or not recipe_title:
+            return None
+        self.lookups += 1
+        doc = await self.collection.find_one({
+            "generationKey": cache.generation_key(recipe_title, ingredients),
+            "generated": True,
+        })
+        if doc is None:
+            return None
+        self.hits += 1
+        return to_details(doc)
+
+    async def find_by_title(self, recipe_title: str) -> Optional[Dict[str, Any]]:
+        """
+        Details of any stored recipe (generated or from the catalog) with
+        exactly this title, or None.
+        """
+        if self.collection is None or not recipe_title:
+            return None
+        doc = await self.collection.find_one({"title": recipe_title})
+        if doc is None:
+            return None
+        return to_details(doc) if doc.get("generated") else recipe_documents.to_details(doc)
+
+    async def save(self, recipe_title: str, ingredients: List[str], details: Dict[str, Any]) -> Optional[str]:
+        """
+        Stores complete generated details (once per generation key).
+
+        Returns:
+            The id of the new recipe, or None if nothing was stored
+        """
+        if not self.active or not is_complete(details):
+            return None
+        try:
+            doc = to_document(recipe_title, ingredients, details)
+        except ValidationError as e:
+            self.rejected += 1
+            print(f"Warning: generated recipe '{recipe_title}' does not fit the recipe model: {e}")
+            return None
+        try:
+            result = await self.collection.update_one(
+                {"generationKey": doc["generationKey"], "generated": True},
+                {"$setOnInsert": doc},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Parallele Generierung desselben Rezepts wurde bereits gespeichert
+            self.duplicates += 1
+            return None
+        if result.upserted_id is None:
+            self.duplicates += 1
+            return None
+        self.saved += 1
+        return str(result.upserted_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_ratio": self.hits / self.lookups if self.lookups else 0.0,
+            "saved": self.saved,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
+
+
+generated_store = GeneratedRecipeStore()
+
+
+async def generate_details(recipe_title: str, ingredients: List[str]) -> Dict[str, Any]:
+    """
+    Returns recipe details for a title: from the stored generations if this
+    generation was seen before, otherwise from the LLM (and stores them).
+    """
+    try:
+        stored = await generated_store.lookup(recipe_title, ingredients)
+        if stored is not None:
+            return stored
+    except Exception as e:
+        print(f"Warning: generated recipe lookup failed: {e}")
+
+    details = await llm_service.generate_recipe_details(recipe_title, ingredients)
+    try:
+        recipe_id = await generated_store.save(recipe_title, ingredients, details)
+        if recipe_id is not None:
+            details = {**details, "recipeId": recipe_id}
+    except Exception as e:
+        print(f"Warning: could not store generated recipe: {e}")
+    return details
+
+
+async def fallback_details(recipe_title: str, ingredients: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Stored recipe for a title, used while the LLM is unavailable (see
+    resilience.py). Titles suggested by ingredient_matcher.fallback_titles
+    are catalog titles, so they are found here.
+    """
+    details = await generated_store.lookup(recipe_title, ingredients)
+    if details is None:
+        details = await generated_store.find_by_title(recipe_title)
+    if details is None:
+        return None
+    # Kennzeichnet die Antwort als Ersatz; sie wird nicht als Generierung gespeichert
+    return {**details, "fallback": True}
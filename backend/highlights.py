@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+import http_cache
+import recipe_documents
+from models import Recipe
+
+# Aktualisierungsintervall des Highlight-Feeds und max-age für Clients (Sekunden)
+HIGHLIGHTS_REFRESH_SECONDS = int(os.getenv("HIGHLIGHTS_REFRESH_SECONDS", "60"))
+HIGHLIGHTS_MAX_AGE = int(os.getenv("HIGHLIGHTS_MAX_AGE", "60"))
+HIGHLIGHTS_LIMIT = 100
+
+
+class FeedVersion:
+    """Pre-serialized body of one view of the feed."""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.body = http_cache.json_body(items)
+        self.etag = http_cache.etag_for(self.body)
+
+
+class HighlightsFeed:
+    """
+    Materialized `/recipes/highlights` feed.
+
+    The highlighted recipes are loaded every HIGHLIGHTS_REFRESH_SECONDS,
+    validated once and kept as ready-to-send JSON in a "full" and a
+    "summary" (card fields only) view, so requests never touch MongoDB.
+    Highlights are only set outside the API (import/migration scripts), so
+    the schedule is the only refresh trigger. Until the first refresh
+    succeeded `get()` returns None.
+    """
+
+    def __init__(self, refresh_seconds: int = HIGHLIGHTS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.collection = None
+        self.views: Dict[str, FeedVersion] = {}
+        self.loaded_at: Optional[float] = None
+        self.refreshes = 0
+        self.served = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, collection) -> None:
+        self.collection = collection
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Kein Abbruch des Starts: der Feed wird im Hintergrund erneut geladen
+            self.errors += 1
+            print(f"Warning: could not load highlights: {e}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> None:
+        docs = await self.collection.find({"highlight": True}).to_list(HIGHLIGHTS_LIMIT)
+        full = []
+        for doc in docs:
+            recipe_documents.prepare_for_response(doc)
+            try:
+                full.append(Recipe(**doc).model_dump(mode="json", by_alias=True))
+            except ValidationError as e:
+                print(f"Warning: skipping invalid highlight {doc['_id']}: {e}")
+        self.views = {
+            "full": FeedVersion(full),
+            "summary": FeedVersion([recipe_documents.to_summary(item) for item in full]),
+        }
+        self.loaded_at = time.time()
+        self.refreshes += 1
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"Warning: highlights refresh failed: {e}")
+
+    def get(self, view: str) -> Optional[FeedVersion]:
+        version = self.views.get(view)
+        if version is not None:
+            self.served += 1
+        return version
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded_at": self.loaded_at,
+            "refreshes": self.refreshes,
+            "served": self.served,
+            "errors": self.errors,
+        }
+
+
+highlights_feed = HighlightsFeed()
@@ -0,0 +1,36 @@
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response
+
+
+def json_body(content: Any) -> bytes:
+    """
+    Serializes content the same way FastAPI's JSONResponse does.
+    """
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    """
+    Strong ETag for a response body.
+    """
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def conditional_response(request: Request, body: bytes, etag: str, max_age: int) -> Response:
+    """
+    Returns a pre-serialized JSON body with ETag/Cache-Control headers, or an
+    empty 304 if the client already has this version (If-None-Match).
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,150 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from ingredient_models import IngredientItem
+
+# Einstellungen für den Cache der Zutatenerkennung (Perceptual Hash)
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "true").lower() == "true"
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv("IMAGE_CACHE_TTL_SECONDS", "604800"))
+IMAGE_CACHE_MAX_DISTANCE = int(os.getenv("IMAGE_CACHE_MAX_DISTANCE", "3"))
+IMAGE_CACHE_COLLECTION = os.getenv("IMAGE_CACHE_COLLECTION", "image_cache")
+
+# Der 64-Bit-Hash wird in max_distance + 1 Bänder zerlegt. Zwei Hashes mit
+# einer Hamming-Distanz von höchstens max_distance stimmen dann in mindestens
+# einem Band überein (Schubfachprinzip), daher reicht ein indizierter
+# $in-Lookup über die Bänder. Bei 3 sind das 4 Bänder zu 16 Bit; mehr als
+# MAX_SUPPORTED_DISTANCE (8 Bänder zu 8 Bit) würde pro Band zu viele
+# Kandidaten treffen.
+HASH_BITS = 64
+MAX_SUPPORTED_DISTANCE = 7
+
+
+def band_count(max_distance: int) -> int:
+    """
+    Number of bands that guarantees a shared band within `max_distance` bits.
+
+    Raises:
+        ValueError: If the distance is negative or above MAX_SUPPORTED_DISTANCE
+    """
+    if not 0 <= max_distance <= MAX_SUPPORTED_DISTANCE:
+        raise ValueError(
+            f"IMAGE_CACHE_MAX_DISTANCE must be between 0 and {MAX_SUPPORTED_DISTANCE}, got {max_distance}"
+        )
+    return max_distance + 1
+
+
+def hash_bands(phash: int, bands: int) -> List[str]:
+    """
+    Splits a 64-bit hash into `bands` position-tagged bands, e.g. "4:3:a7f0"
+    (band count, position, value). Bands differ in size by at most one bit.
+    """
+    values = []
+    shift = 0
+    for i in range(bands):
+        bits = HASH_BITS // bands + (1 if i < HASH_BITS % bands else 0)
+        values.append(f"{bands}:{i}:{(phash >> shift) & ((1 << bits) - 1):x}")
+        shift += bits
+    return values
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class PerceptualImageCache:
+    """
+    Caches detected ingredients per image, keyed on a perceptual hash.
+
+    Entries live in a MongoDB collection so all workers share them. A lookup
+    checks the exact hash first, then scores all band candidates and returns
+    the stored ingredients of the closest image whose hash is within
+    `max_distance` bits. Without a collection (before startup) every lookup
+    is a miss.
+    """
+
+    def __init__(self, enabled: bool = IMAGE_CACHE_ENABLED,
+                 ttl: int = IMAGE_CACHE_TTL_SECONDS,
+                 max_distance: int = IMAGE_CACHE_MAX_DISTANCE):
+        self.collection = None
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.bands = band_count(max_distance)
+        self.hits = 0
+        self.misses = 0
+
+    def attach(self, collection) -> None:
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("hash", unique=True)
+        await self.collection.create_index("bands")
+        await self.collection.create_index("expiresAt", expireAfterSeconds=0)
+
+    async def lookup(self, phash: int) -> Optional[List[IngredientItem]]:
+        """
+        Returns the cached ingredients of the most similar stored image, if any.
+        """
+        if not self.enabled or self.collection is None:
+            return None
+        now = datetime.now(timezone.utc)
+        try:
+            # Exakt dasselbe Bild: direkter Treffer über den eindeutigen Hash-Index
+            best = await self.collection.find_one(
+                {"hash": f"{phash:016x}", "expiresAt": {"$gt": now}}, {"ingredients": 1}
+            )
+            if best is None and self.max_distance > 0:
+                # Alle Kandidaten der Bänder bewerten (nur der Hash wird geladen)
+                best_hash = None
+                best_distance = self.max_distance + 1
+                async for doc in self.collection.find(
+                    {"bands": {"$in": hash_bands(phash, self.bands)}, "expiresAt": {"$gt": now}},
+                    {"_id": 0, "hash": 1},
+                ):
+                    distance = hamming_distance(phash, int(doc["hash"], 16))
+                    if distance < best_distance:
+                        best_hash, best_distance = doc["hash"], distance
+                if best_hash is not None:
+                    best = await self.collection.find_one({"hash": best_hash}, {"ingredients": 1})
+        except Exception as e:
+            print(f"Warning: image cache lookup failed: {e}")
+            return None
+
+        if best is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [IngredientItem(**item) for item in best["ingredients"]]
+
+    async def store(self, phash: int, ingredients: List[IngredientItem]) -> None:
+        """
+        Stores the detected ingredients for an image hash.
+        """
+        if not self.enabled or self.collection is None or not ingredients:
+            return
+        key = f"{phash:016x}"
+        try:
+            await self.collection.replace_one(
+                {"hash": key},
+                {
+                    "hash": key,
+                    "bands": hash_bands(phash, self.bands),
+                    "ingredients": [item.model_dump() for item in ingredients],
+                    "expiresAt": datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"Warning: image cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "max_distance": self.max_distance,
+            "bands": self.bands,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
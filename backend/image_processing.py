@@ -0,0 +1,179 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Einstellungen für die Bildvorverarbeitung vor dem Vision-Aufruf
+IMAGE_PREPROCESSING = os.getenv("IMAGE_PREPROCESSING", "true").lower() == "true"
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1024"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "jpeg").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+# Detailstufe für das Vision-Modell: "low", "high" oder "auto"
+IMAGE_DETAIL = os.getenv("IMAGE_DETAIL", "high").lower()
+
+_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+@dataclass
+class PreparedImage:
+    """A Base64 image ready to be sent to the vision model."""
+    data: str
+    mime_type: str
+    original_bytes: int
+    processed_bytes: int
+    phash: Optional[int] = None
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.original_bytes - self.processed_bytes)
+
+    @property
+    def content_key(self) -> str:
+        """Identifies the exact image that is sent to the model."""
+        return "image:" + hashlib.sha256(self.data.encode("ascii")).hexdigest()
+
+
+class ImageStats:
+    """Totals over all preprocessed images since startup."""
+
+    def __init__(self):
+        self.images = 0
+        self.failures = 0
+        self.original_bytes = 0
+        self.processed_bytes = 0
+        self.bytes_saved = 0
+
+    def record(self, image: PreparedImage) -> None:
+        self.images += 1
+        self.original_bytes += image.original_bytes
+        self.processed_bytes += image.processed_bytes
+        # Pro Bild höchstens 0, damit größere Neukodierungen die Ersparnis nicht verrechnen
+        self.bytes_saved += image.bytes_saved
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": IMAGE_PREPROCESSING,
+            "max_edge": IMAGE_MAX_EDGE,
+            "format": IMAGE_FORMAT,
+            "detail": IMAGE_DETAIL,
+            "images": self.images,
+            "failures": self.failures,
+            "original_bytes": self.original_bytes,
+            "processed_bytes": self.processed_bytes,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+image_stats = ImageStats()
+
+
+def strip_data_url(base64_string: str) -> str:
+    """
+    Removes a `data:image/...;base64,` prefix if the client sent a data URL.
+    """
+    if base64_string.startswith("data:") and "," in base64_string:
+        return base64_string.split(",", 1)[1]
+    return base64_string
+
+
+def decode_image(base64_string: str) -> Image.Image:
+    """
+    Decodes a Base64 image and applies its EXIF orientation.
+
+    Raises:
+        ValueError: If the payload is not a decodable image
+    """
+    try:
+        raw = base64.b64decode(strip_data_url(base64_string))
+        image = Image.open(io.BytesIO(raw))
+        image.load()
+    except (binascii.Error, UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"Ungültiges Bild: {e}")
+    return ImageOps.exif_transpose(image)
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Computes a 64-bit difference hash (dHash) of an image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail
+    and every bit records whether a pixel is brighter than its right
+    neighbour. Re-compression, resizing and small crops only flip a few
+    bits, so similar photos have a small Hamming distance.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def prepare_image(base64_string: str, compute_hash: bool = False) -> PreparedImage:
+    """
+    Downscales and re-encodes an image before it is sent to the vision model.
+
+    The image is rotated according to its EXIF orientation, resized so that
+    its longest edge is at most IMAGE_MAX_EDGE and re-encoded as IMAGE_FORMAT.
+    Metadata (EXIF, GPS) is not carried over, so the re-encoded image is sent
+    even if it is not smaller than the original (e.g. small, already
+    compressed JPEGs). Only payloads that cannot be decoded are passed
+    through unchanged.
+
+    Args:
+        base64_string: Base64-encoded image (optionally as data URL)
+        compute_hash: Also compute the perceptual hash of the decoded image
+
+    Returns:
+        PreparedImage: Re-encoded image plus size information
+    """
+    payload = strip_data_url(base64_string)
+    original_bytes = len(payload) * 3 // 4
+
+    if not IMAGE_PREPROCESSING and not compute_hash:
+        return PreparedImage(payload, "image/jpeg", original_bytes, original_bytes)
+
+    try:
+        image = decode_image(payload)
+    except ValueError as e:
+        image_stats.failures += 1
+        print(f"Warning: image preprocessing skipped: {e}")
+        return PreparedImage(payload, "image/jpeg", original_bytes, original_bytes)
+
+    phash = difference_hash(image) if compute_hash else None
+    if not IMAGE_PREPROCESSING:
+        return PreparedImage(payload, "image/jpeg", original_bytes, original_bytes, phash)
+
+    pil_format, mime_type = _FORMATS.get(IMAGE_FORMAT, _FORMATS["jpeg"])
+    image = image.convert("RGB")
+    image.thumbnail((IMAGE_MAX_EDGE, IMAGE_MAX_EDGE), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, quality=IMAGE_QUALITY, optimize=True)
+    # Auch wenn die Neukodierung nicht kleiner ist: das Original enthält EXIF/GPS
+    # und ist nicht gedreht (bytes_saved ist dann 0)
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    prepared = PreparedImage(encoded, mime_type, original_bytes, buffer.tell(), phash)
+    image_stats.record(prepared)
+    return prepared
+
+
+async def prepare_image_async(base64_string: str, compute_hash: bool = False) -> PreparedImage:
+    """
+    Runs `prepare_image` in a worker thread so decoding and resizing do not
+    block the event loop.
+    """
+    return await asyncio.to_thread(prepare_image, base64_string, compute_hash)
@@ -0,0 +1,261 @@
+"""
+Indexe der Rezept-Collection.
+
+Alle Indexe, auf die sich die Abfragen von /recipes, /search und den
+Hilfsdiensten verlassen, sind hier deklariert. Beim Start werden sie angelegt
+bzw. geprüft und die Ausführungspläne der wichtigsten Abfrageformen geloggt,
+damit ein fehlender Index als Warnung beim Start auffällt.
+
+    python indexes.py            # prüfen und Ausführungspläne ausgeben
+    python indexes.py --create   # fehlende Indexe anlegen
+"""
+import argparse
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure
+
+import database
+import search
+
+# Indexe beim Start anlegen (sonst nur prüfen) und Ausführungspläne loggen
+INDEX_AUTO_CREATE = os.getenv("INDEX_AUTO_CREATE", "true").lower() == "true"
+INDEX_EXPLAIN_ON_STARTUP = os.getenv("INDEX_EXPLAIN_ON_STARTUP", "true").lower() == "true"
+
+# Fehlercodes für "Index existiert bereits mit anderem Namen/anderen Optionen"
+_INDEX_CONFLICT_CODES = (85, 86)
+
+
+@dataclass
+class IndexSpec:
+    """One declared index."""
+
+    name: str
+    keys: List[Tuple[str, Any]]
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_text(self) -> bool:
+        return any(direction == "text" for _, direction in self.keys)
+
+
+RECIPE_INDEXES = [
+    # Standardsortierung der Listen inkl. Tie-Breaker der Keyset-Paginierung
+    IndexSpec("title_id", [("title", 1), ("_id", 1)]),
+    IndexSpec("category", [("category", 1)]),
+    IndexSpec("area", [("area", 1)]),
+    IndexSpec("highlight", [("highlight", 1)]),
+    # Abruf über die TheMealDB-ID in /recipes/{id}
+    IndexSpec("idMeal", [("idMeal", 1)]),
+    IndexSpec("ingredients_name", [("ingredients.name", 1)]),
+    # Numerische Sortierung und max_minutes (siehe recipe_documents.NUMERIC_SORT_FIELDS)
+    IndexSpec("cookingMinutes_id", [("cookingMinutes", 1), ("_id", 1)]),
+    IndexSpec("servingsCount_id", [("servingsCount", 1), ("_id", 1)]),
+    # Jede Generierung (Titel + Zutaten) wird nur einmal gespeichert
+    IndexSpec(
+        "generationKey",
+        [("generationKey", 1)],
+        {"unique": True, "partialFilterExpression": {"generated": True}},
+    ),
+    # Gewichteter Textindex für den Suchmodus "text"
+    IndexSpec(
+        search.TEXT_INDEX_NAME,
+        [(name, "text") for name in search.TEXT_INDEX_WEIGHTS],
+        {"weights": search.TEXT_INDEX_WEIGHTS, "default_language": search.TEXT_SEARCH_LANGUAGE},
+    ),
+]
+
+# Abfrageformen von get_recipes/search_recipes: (Name, Filter, Sortierung)
+QUERY_SHAPES = [
+    ("recipes by title", {}, [("title", 1), ("_id", 1)]),
+    ("recipes by category", {"category": search.contains("Seafood")}, [("title", 1), ("_id", 1)]),
+    ("recipes by area", {"area": search.contains("Italian")}, [("title", 1), ("_id", 1)]),
+    ("recipes by cooking time", {"cookingMinutes": {"$lte": 30}}, [("cookingMinutes", 1), ("_id", 1)]),
+    ("recipes by servings", {}, [("servingsCount", -1), ("_id", -1)]),
+    ("highlights", {"highlight": True}, None),
+    ("recipe by idMeal", {"idMeal": "52772"}, None),
+    ("generated recipe", {"generationKey": "generated:0", "generated": True}, None),
+    ("search by ingredient", {"ingredients.name": search.contains("chicken")}, None),
+    ("text search", search.text_search_filter("chicken"), None),
+]
+
+
+# Schlüssel, die MongoDB intern für Textindexe anlegt
+_TEXT_INDEX_KEYS = ("_fts", "_ftsx")
+
+
+def _existing_index(spec: IndexSpec, existing: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the existing index that stands for `spec` (same name, same keys,
+    or any text index for a text spec), or None.
+    """
+    if spec.name in existing:
+        return existing[spec.name]
+    for info in existing.values():
+        keys = [tuple(item) for item in info["key"]]
+        if spec.is_text and any(direction == "text" for _, direction in keys):
+            # Es gibt höchstens einen Textindex pro Collection
+            return info
+        if keys == [tuple(item) for item in spec.keys]:
+            return info
+    return None
+
+
+def _is_present(spec: IndexSpec, existing: Dict[str, Dict[str, Any]]) -> bool:
+    return _existing_index(spec, existing) is not None
+
+
+def _mismatch(spec: IndexSpec, info: Dict[str, Any]) -> Optional[str]:
+    """
+    Describes how an existing index differs from its declaration, or None.
+    """
+    keys = [tuple(item) for item in info["key"]]
+    if spec.is_text:
+        # Textindexe speichern die Felder als weights, Schlüssel sind _fts/_ftsx
+        declared_weights = spec.options.get("weights") or {name: 1 for name, _ in spec.keys}
+        weights = dict(info.get("weights") or {})
+        if weights != declared_weights:
+            return f"weights {weights} instead of {declared_weights}"
+        declared_language = spec.options.get("default_language", "english")
+        if info.get("default_language", "english") != declared_language:
+            return f"default_language {info.get('default_language', 'english')} instead of {declared_language}"
+        extra = [key for key in keys if key[0] not in _TEXT_INDEX_KEYS]
+        declared_extra = [key for key in spec.keys if key[1] != "text"]
+        if extra != declared_extra:
+            return f"key fields {extra} instead of {declared_extra}"
+    elif keys != [tuple(item) for item in spec.keys]:
+        return f"keys {keys} instead of {spec.keys}"
+    if bool(info.get("unique")) != bool(spec.options.get("unique")):
+        return f"unique={bool(info.get('unique'))} instead of {bool(spec.options.get('unique'))}"
+    if info.get("partialFilterExpression") != spec.options.get("partialFilterExpression"):
+        return (f"partialFilterExpression {info.get('partialFilterExpression')} "
+                f"instead of {spec.options.get('partialFilterExpression')}")
+    return None
+
+
+async def missing_indexes(collection, specs: List[IndexSpec] = RECIPE_INDEXES) -> List[IndexSpec]:
+    """
+    Returns the declared indexes that do not exist (matched by name or keys).
+    """
+    existing = await collection.index_information()
+    return [spec for spec in specs if not _is_present(spec, existing)]
+
+
+async def mismatched_indexes(collection, specs: List[IndexSpec] = RECIPE_INDEXES) -> List[Tuple[IndexSpec, str]]:
+    """
+    Returns the declared indexes that exist with different keys, weights or
+    options, each with a description of the difference. They are not
+    recreated automatically (dropping an index is a manual decision).
+    """
+    existing = await collection.index_information()
+    mismatches = []
+    for spec in specs:
+        info = _existing_index(spec, existing)
+        difference = _mismatch(spec, info) if info is not None else None
+        if difference is not None:
+            mismatches.append((spec, difference))
+    return mismatches
+
+
+async def ensure_indexes(collection, specs: List[IndexSpec] = RECIPE_INDEXES) -> List[str]:
+    """
+    Creates all missing declared indexes.
+
+    Returns:
+        List[str]: Names of the indexes that were created
+    """
+    created = []
+    for spec in await missing_indexes(collection, specs):
+        try:
+            await collection.create_index(spec.keys, name=spec.name, **spec.options)
+            created.append(spec.name)
+        except OperationFailure as e:
+            if e.code not in _INDEX_CONFLICT_CODES:
+                raise
+            print(f"Warning: index {spec.name} conflicts with an existing index: {e}")
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """
+    Flattens a winning plan into its stage names (root first).
+    """
+    stages = []
+    pending = [plan.get("queryPlan", plan)]
+    while pending:
+        stage = pending.pop(0)
+        stages.append(stage.get("stage", "?"))
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+        pending.extend(stage.get("inputStages", []))
+    return stages
+
+
+async def explain_query(collection, query: Dict[str, Any],
+                        sort: Optional[List[Tuple[str, int]]] = None, limit: int = 10) -> List[str]:
+    """
+    Returns the stages of the winning plan for one query shape.
+    """
+    cursor = collection.find(query).limit(limit)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = await cursor.explain()
+    return _plan_stages(explanation["queryPlanner"]["winningPlan"])
+
+
+async def explain_query_shapes(collection) -> List[Dict[str, Any]]:
+    """
+    Explains every entry of QUERY_SHAPES and prints the plans. Shapes that
+    scan the whole collection or sort in memory are reported as warnings.
+    """
+    report = []
+    for name, query, sort in QUERY_SHAPES:
+        try:
+            stages = await explain_query(collection, query, sort)
+        except OperationFailure as e:
+            print(f"Warning: could not explain '{name}': {e}")
+            continue
+        unindexed = "COLLSCAN" in stages or "SORT" in stages
+        plan = " <- ".join(stages)
+        if unindexed:
+            print(f"Warning: query '{name}' is not fully indexed: {plan}")
+        else:
+            print(f"Query plan '{name}': {plan}")
+        report.append({"query": name, "stages": stages, "indexed": not unindexed})
+    return report
+
+
+async def check_recipe_indexes(collection, create: bool = INDEX_AUTO_CREATE,
+                               explain: bool = INDEX_EXPLAIN_ON_STARTUP) -> None:
+    """
+    Startup check: creates (or only verifies) the declared indexes and
+    optionally logs the query plans.
+    """
+    if create:
+        created = await ensure_indexes(collection)
+        if created:
+            print(f"Created indexes: {', '.join(created)}")
+    for spec in await missing_indexes(collection):
+        print(f"Warning: missing index {spec.name} on {spec.keys}")
+    for spec, difference in await mismatched_indexes(collection):
+        print(f"Warning: index {spec.name} differs from its declaration: {difference}")
+    if explain:
+        await explain_query_shapes(collection)
+
+
+async def _main(create: bool) -> None:
+    client = database.create_client(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    collection = client[os.getenv("DB_NAME", "mealmate")]["recipes"]
+    await check_recipe_indexes(collection, create=create, explain=True)
+    client.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Prüft die Indexe der Rezept-Collection")
+    parser.add_argument("--create", action="store_true", help="Fehlende Indexe anlegen")
+    args = parser.parse_args()
+    asyncio.run(_main(args.create))
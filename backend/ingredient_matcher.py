@@ -0,0 +1,264 @@
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+import cache
+import recipe_documents
+
+# Rezeptvorschläge zuerst aus der Datenbank; das LLM wird nur gefragt, wenn
+# weniger als MATCH_MIN_RESULTS Rezepte mindestens MATCH_MIN_COVERAGE erreichen
+MATCH_ENABLED = os.getenv("MATCH_ENABLED", "true").lower() == "true"
+MATCH_MIN_RESULTS = int(os.getenv("MATCH_MIN_RESULTS", "3"))
+MATCH_MIN_COVERAGE = float(os.getenv("MATCH_MIN_COVERAGE", "0.6"))
+MATCH_REFRESH_SECONDS = int(os.getenv("MATCH_REFRESH_SECONDS", "600"))
+# Ist das LLM nicht erreichbar, genügen Rezepte mit geringerer Abdeckung
+MATCH_FALLBACK_MIN_COVERAGE = float(os.getenv("MATCH_FALLBACK_MIN_COVERAGE", "0.3"))
+
+# Zutaten, die wie im LLM-Prompt als vorhanden gelten
+PANTRY = frozenset({"salt", "pepper", "black pepper", "oil", "olive oil", "vegetable oil", "water", "sugar"})
+
+# Synonyme (nach Singularbildung) auf einen gemeinsamen Namen abbilden
+SYNONYMS = {
+    "aubergine": "eggplant",
+    "courgette": "zucchini",
+    "coriander": "cilantro",
+    "prawn": "shrimp",
+    "king prawn": "shrimp",
+    "scallion": "spring onion",
+    "green onion": "spring onion",
+    "minced beef": "ground beef",
+    "beef mince": "ground beef",
+    "chick pea": "chickpea",
+    "garbanzo bean": "chickpea",
+    "capsicum": "bell pepper",
+    "red pepper": "bell pepper",
+    "green pepper": "bell pepper",
+    "plain flour": "flour",
+    "all purpose flour": "flour",
+    "caster sugar": "sugar",
+    "spaghetti": "pasta",
+    "penne": "pasta",
+    "tomato puree": "tomato paste",
+    "double cream": "heavy cream",
+}
+
+# Unregelmäßige Plurale, die die Endungsregeln nicht abdecken
+IRREGULAR_PLURALS = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife"}
+# Wörter auf -s, die keine Plurale sind
+SINGULAR_S = frozenset({"asparagus", "couscous", "hummus", "molasses", "swiss", "brussels", "lemongrass", "watercress", "citrus"})
+
+_WORD_PATTERN = re.compile(r"[a-zäöüß]+")
+
+
+def singularize(word: str) -> str:
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if len(word) <= 3 or word in SINGULAR_S or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(name: Any) -> str:
+    """
+    Canonical form of an ingredient name for matching: "Tomatoes" and
+    "tomato" become "tomato", "Aubergines" becomes "eggplant".
+    """
+    words = [singularize(word) for word in _WORD_PATTERN.findall(cache.normalize_ingredient_name(name))]
+    normalized = " ".join(words)
+    return SYNONYMS.get(normalized, normalized)
+
+
+def ingredient_tokens(name: Any) -> FrozenSet[str]:
+    return frozenset(normalize_ingredient(name).split())
+
+
+@dataclass
+class IndexedRecipe:
+    id: Any
+    title: str
+    # Pro Zutat (ohne Vorratszutaten) die Wörter des normalisierten Namens
+    ingredients: List[FrozenSet[str]]
+    names: List[str]
+
+
+@dataclass
+class MatchResult:
+    """One stored recipe ranked against the user's ingredients."""
+
+    id: str
+    title: str
+    coverage: float
+    matched: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+
+class IngredientMatcher:
+    """
+    Ranks stored recipes by how well the user's ingredients cover them.
+
+    Keeps an inverted index from normalized ingredient words to recipes. A
+    recipe ingredient counts as available if all words of one of the user's
+    ingredients occur in it ("chicken" covers "chicken breasts"); pantry
+    staples are ignored. Recipes are ranked by coverage, then by the number
+    of missing ingredients.
+
+    The index is loaded at startup and reloaded in a background task with
+    one projection scan every MATCH_REFRESH_SECONDS; `match` always reads the
+    current snapshot.
+    """
+
+    def __init__(self, refresh_seconds: int = MATCH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.collection = None
+        self.recipes: Dict[str, IndexedRecipe] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        # Normalisierter Titel -> _id der Katalogrezepte (ohne generierte Rezepte)
+        self.catalog_titles: Dict[str, Any] = {}
+        self.loaded_at: Optional[float] = None
+        self.queries = 0
+        self.refreshes = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, collection) -> None:
+        self.collection = collection
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Kein Abbruch des Starts: der Index wird im Hintergrund erneut geladen
+            self.errors += 1
+            print(f"Warning: could not load ingredient index: {e}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def _index_recipe(doc: Dict[str, Any]) -> Optional[IndexedRecipe]:
+        ingredients = []
+        names = []
+        for ingredient in doc.get("ingredients") or []:
+            name = ingredient.get("name") if isinstance(ingredient, dict) else None
+            if not name or normalize_ingredient(name) in PANTRY:
+                continue
+            tokens = ingredient_tokens(name)
+            if tokens:
+                ingredients.append(tokens)
+                names.append(name)
+        if not ingredients:
+            return None
+        return IndexedRecipe(doc["_id"], doc.get("title") or "", ingredients, names)
+
+    async def refresh(self) -> None:
+        recipes: Dict[str, IndexedRecipe] = {}
+        postings: Dict[str, Set[str]] = {}
+        catalog_titles: Dict[str, Any] = {}
+        async for doc in self.collection.find({}, {"title": 1, "ingredients.name": 1, "generated": 1}):
+            if doc.get("title") and not doc.get("generated"):
+                catalog_titles.setdefault(cache.normalize_ingredient_name(doc["title"]), doc["_id"])
+            recipe = self._index_recipe(doc)
+            if recipe is None:
+                continue
+            key = str(recipe.id)
+            recipes[key] = recipe
+            for tokens in recipe.ingredients:
+                for token in tokens:
+                    postings.setdefault(token, set()).add(key)
+        self.recipes = recipes
+        self.postings = postings
+        self.catalog_titles = catalog_titles
+        self.loaded_at = time.time()
+        self.refreshes += 1
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"Warning: ingredient index refresh failed: {e}")
+
+    def _rank(self, available: List[FrozenSet[str]], min_coverage: float) -> List[MatchResult]:
+        candidates: Set[str] = set()
+        for tokens in available:
+            for token in tokens:
+                candidates |= self.postings.get(token, set())
+
+        matches = []
+        for key in candidates:
+            recipe = self.recipes[key]
+            matched, missing = [], []
+            for tokens, name in zip(recipe.ingredients, recipe.names):
+                if any(have <= tokens for have in available):
+                    matched.append(name)
+                else:
+                    missing.append(name)
+            coverage = len(matched) / len(recipe.ingredients)
+            if matched and coverage >= min_coverage:
+                matches.append(MatchResult(key, recipe.title, round(coverage, 3), matched, missing))
+
+        matches.sort(key=lambda m: (-m.coverage, len(m.missing), m.title))
+        return matches
+
+    def match(self, ingredients: Iterable[Any], limit: int = 10,
+              min_coverage: float = MATCH_MIN_COVERAGE) -> List[MatchResult]:
+        """
+        Returns the best stored recipes for the given ingredient names.
+        """
+        self.queries += 1
+        available = list({ingredient_tokens(name) for name in ingredients} - {frozenset()})
+        if not available:
+            return []
+        return self._rank(available, min_coverage)[:limit]
+
+    async def stored_details(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        Details of the catalog recipe with this title (as suggested by
+        `match`), in the /recipes/generate/details shape, or None.
+        """
+        recipe_id = self.catalog_titles.get(cache.normalize_ingredient_name(title))
+        if recipe_id is None:
+            return None
+        doc = await self.collection.find_one({"_id": recipe_id})
+        return recipe_documents.to_details(doc) if doc else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": MATCH_ENABLED,
+            "recipes": len(self.recipes),
+            "ingredients": len(self.postings),
+            "queries": self.queries,
+            "loaded_at": self.loaded_at,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+
+ingredient_matcher = IngredientMatcher()
+
+
+async def fallback_titles(ingredients: List[str], limit: int = 5) -> Optional[List[str]]:
+    """
+    Titles of the best stored recipes, used instead of generated suggestions
+    while the LLM is unavailable (see resilience.py).
+    """
+    if not MATCH_ENABLED or ingredient_matcher.collection is None:
+        return None
+    matches = ingredient_matcher.match(ingredients, limit=limit, min_coverage=MATCH_FALLBACK_MIN_COVERAGE)
+    return [match.title for match in matches] or None
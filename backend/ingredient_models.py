@@ -13,3 +13,4 @@ class IngredientsResponse(BaseModel):
     message: str = Field(..., description="Status message")
     ingredients: List[IngredientItem] = Field([], description="List of detected ingredients")
     error: Optional[str] = Field(None, description="Error message in case of failure")
+    bytes_saved: Optional[int] = Field(None, description="Bytes saved by server-side image preprocessing")
@@ -1,5 +1,7 @@
+import asyncio
 import getpass
 import os
+import time
 
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -7,7 +9,14 @@ import json
 import io
 from dotenv import load_dotenv
 from ingredient_models import IngredientItem, IngredientsResponse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
+import cache
+import image_processing
+import image_cache
+import streaming
+import metrics
+import singleflight
+import resilience
 
 load_dotenv()
 if not os.environ.get('AZURE_OPENAI_API_KEY'):
@@ -18,9 +27,223 @@ llm = AzureChatOpenAI(
     azure_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT"],
     api_version=os.environ["AZURE_OPENAI_API_VERSION"],
     api_key=os.environ["AZURE_OPENAI_API_KEY"],
+    # Token-Verbrauch auch bei gestreamten Antworten melden (erfordert eine aktuelle API-Version)
+    stream_usage=os.getenv("LLM_STREAM_USAGE", "false").lower() == "true",
+    # Wiederholungen übernimmt resilience.py (mit Deadline und Circuit Breaker)
+    max_retries=int(os.getenv("LLM_CLIENT_MAX_RETRIES", "0")),
 )
 
-def process_image_with_langchain(prompt, base64_image_string, output_format="json"):
+# Obergrenze für gleichzeitige LLM-Aufrufe und Timeout pro Aufruf (Sekunden)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+
+class LLMLimiter:
+    """
+    Global concurrency limiter for LLM calls.
+
+    Calls beyond `max_concurrency` wait in the semaphore queue instead of
+    piling up on Azure; the counters describe the current queue depth and
+    the outcome of finished calls.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.queue_timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.total_call_seconds = 0.0
+
+    async def _acquire(self, deadline: Optional[float] = None) -> float:
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        queued_at = time.perf_counter()
+        try:
+            if deadline is None:
+                await self._semaphore.acquire()
+            else:
+                remaining = deadline - asyncio.get_running_loop().time()
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, remaining))
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            raise resilience.DeadlineExceeded("LLM deadline exceeded while waiting for a free slot")
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.in_flight += 1
+        return started_at
+
+    def _release(self, started_at: float, function: str, status: str) -> None:
+        self.in_flight -= 1
+        seconds = time.perf_counter() - started_at
+        self.total_call_seconds += seconds
+        self._semaphore.release()
+        metrics.observe_llm_call(function, status, seconds)
+
+    async def run(self, call, timeout: float, function: str = "llm", deadline: Optional[float] = None):
+        """
+        Runs `call()` (a coroutine factory) once a slot is free.
+
+        The timeout only covers the LLM call itself, not the time spent
+        waiting for a slot. `function` labels the call in the metrics.
+        An optional `deadline` (event loop time) bounds waiting and call.
+        """
+        started_at = await self._acquire(deadline)
+        if deadline is not None:
+            timeout = min(timeout, deadline - asyncio.get_running_loop().time())
+        status = "error"
+        try:
+            result = await asyncio.wait_for(call(), timeout=timeout)
+            self.completed += 1
+            status = "ok"
+            metrics.count_llm_tokens(function, getattr(result, "usage_metadata", None))
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            status = "timeout"
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._release(started_at, function, status)
+
+    async def stream(self, call, timeout: float, function: str = "llm", deadline: Optional[float] = None):
+        """
+        Yields the chunks of `call()` (an async iterator factory) while
+        holding a slot for the whole stream.
+
+        The timeout is a deadline for the complete stream; an optional
+        `deadline` (event loop time) also bounds waiting for the slot.
+        """
+        started_at = await self._acquire(deadline)
+        loop = asyncio.get_running_loop()
+        deadline = min(loop.time() + timeout, deadline if deadline is not None else float("inf"))
+        status = "error"
+        try:
+            iterator = call().__aiter__()
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                # Nur der letzte Chunk enthält den Token-Verbrauch (mit LLM_STREAM_USAGE)
+                metrics.count_llm_tokens(function, getattr(chunk, "usage_metadata", None))
+                yield chunk
+            self.completed += 1
+            status = "ok"
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            status = "timeout"
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._release(started_at, function, status)
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.timeouts + self.errors
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "queue_timeouts": self.queue_timeouts,
+            "avg_wait_seconds": self.total_wait_seconds / finished if finished else 0.0,
+            "avg_call_seconds": self.total_call_seconds / finished if finished else 0.0,
+        }
+
+
+limiter = LLMLimiter(LLM_MAX_CONCURRENCY)
+
+
+async def invoke_llm(messages, timeout: float = None, function: str = "llm"):
+    """
+    Invokes the LLM asynchronously through the global limiter.
+
+    Transient errors are retried within the deadline of the operation
+    `function` (see resilience.py); while the circuit breaker is open the
+    call fails immediately with resilience.CircuitOpenError.
+
+    Args:
+        messages: LangChain messages to send
+        timeout: Per-call timeout in seconds (defaults to LLM_TIMEOUT_SECONDS)
+        function: Name of the calling function for the metrics and deadlines
+
+    Returns:
+        The LLM response message
+    """
+    timeout = timeout if timeout is not None else LLM_TIMEOUT_SECONDS
+    return await resilience.llm_policy.call(
+        function,
+        lambda deadline: limiter.run(lambda: llm.ainvoke(messages), timeout, function, deadline),
+    )
+
+
+def stream_llm(messages, timeout: float = None, function: str = "llm"):
+    """
+    Streams the LLM response chunks through the global limiter.
+
+    Like invoke_llm, but a failed stream is only retried until its first
+    chunk has arrived.
+
+    Args:
+        messages: LangChain messages to send
+        timeout: Deadline for the whole stream in seconds (defaults to LLM_TIMEOUT_SECONDS)
+        function: Name of the calling function for the metrics and deadlines
+
+    Returns:
+        Async iterator over the response chunks
+    """
+    timeout = timeout if timeout is not None else LLM_TIMEOUT_SECONDS
+    return resilience.llm_policy.stream(
+        function,
+        lambda deadline: limiter.stream(lambda: llm.astream(messages), timeout, function, deadline),
+    )
+
+
+# Antwort-Cache für Rezeptgenerierungen; die MongoDB-Stufe wird beim Start ergänzt
+response_cache = cache.TieredCache([cache.MemoryCache()])
+
+# Cache der Zutatenerkennung pro Bild; die Collection wird beim Start gesetzt
+image_result_cache = image_cache.PerceptualImageCache()
+
+# Gleichzeitige identische Anfragen (gleicher Cache-Schlüssel bzw. gleiches Bild)
+# teilen sich einen LLM-Aufruf
+llm_flights = singleflight.SingleFlight()
+
+# Werden mit (Titel, Zutaten) aufgerufen, sobald eine Titelliste vorliegt (z.B. Prefetch)
+recipe_list_listeners: List[Callable[[List[str], List[str]], None]] = []
+
+
+def _notify_recipe_list(recipe_list: List[str], ingredients: List[str]) -> None:
+    for listener in recipe_list_listeners:
+        try:
+            listener(recipe_list, ingredients)
+        except Exception as e:
+            print(f"Warning: recipe list listener failed: {e}")
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    """Returns the current limiter metrics (queue depth, in-flight calls, outcomes)."""
+    return limiter.stats()
+
+async def process_image_with_langchain(prompt, base64_image_string, output_format="json",
+                                       mime_type="image/jpeg", detail=None, function="process_image"):
     """
     Process a request with text and base64 encoded image using LangChain.
     
@@ -28,6 +251,9 @@ def process_image_with_langchain(prompt, base64_image_string, output_format="jso
         prompt: Text prompt from user
         base64_image_string: Base64 encoded image string from frontend
         output_format: 'json'
+        mime_type: MIME type of the encoded image
+        detail: Vision detail level ("low", "high", "auto"), defaults to IMAGE_DETAIL
+        function: Name of the calling function for the metrics
         
     Returns:
         Parsed response in requested format
@@ -43,15 +269,15 @@ def process_image_with_langchain(prompt, base64_image_string, output_format="jso
             {"type": "text", "text": prompt},
             {"type": "image_url", 
              "image_url": {
-                "url": f"data:image/jpeg;base64,{base64_image_string}",
-                "detail": "high"
+                "url": f"data:{mime_type};base64,{base64_image_string}",
+                "detail": detail or image_processing.IMAGE_DETAIL
              }
             }
         ]
     )
     
     # Invoke the LLM with the messages
-    response = llm.invoke([system_message, human_message])
+    response = await invoke_llm([system_message, human_message], function=function)
     content = response.content
     
     # Parse the response based on requested format
@@ -61,10 +287,98 @@ def process_image_with_langchain(prompt, base64_image_string, output_format="jso
         return content
 
 
-def analyze_images(base64_images: List[str]) -> IngredientsResponse:
+# System prompt for ingredient detection (one image per LLM call)
+INGREDIENT_DETECTION_PROMPT = """Analyze this image of a refrigerator or kitchen and identify all 
+        visible food items and ingredients. If possible, also provide quantities and units.
+        
+        Answer with a JSON list in the following format:
+        [
+            {"name": "Ingredient1", "amount": "Quantity1", "unit": "Unit1"},
+            {"name": "Ingredient2", "amount": "Quantity2", "unit": "Unit2"},
+            ...
+        ]
+        
+        If quantity or unit cannot be determined, omit the corresponding fields.
+        Answer ONLY with the JSON list, without additional text."""
+
+# Maximale Anzahl an Bildern, die pro Anfrage gleichzeitig analysiert werden
+IMAGE_ANALYSIS_CONCURRENCY = int(os.getenv("IMAGE_ANALYSIS_CONCURRENCY", "4"))
+
+
+async def detect_ingredients_in_image(base64_image: str, mime_type: str = "image/jpeg") -> List[IngredientItem]:
+    """
+    Detects the ingredients visible in a single image.
+    
+    Args:
+        base64_image: Base64-encoded image
+        mime_type: MIME type of the encoded image
+        
+    Returns:
+        List[IngredientItem]: Detected ingredients (may be empty)
+    """
+    # Rufe die LangChain-Funktion auf
+    result = await process_image_with_langchain(
+        INGREDIENT_DETECTION_PROMPT, base64_image, mime_type=mime_type, function="analyze_images"
+    )
+    
+    # Überprüfe ob das Ergebnis eine Liste ist
+    if not isinstance(result, list):
+        # Wenn nicht, versuche, es als Objekt zu interpretieren
+        if isinstance(result, dict) and "ingredients" in result:
+            result = result["ingredients"]
+        else:
+            raise ValueError(f"Ungültiges Antwortformat: {result}")
+    
+    # Konvertiere die erkannten Zutaten in IngredientItem-Objekte
+    ingredients = []
+    for item in result:
+        if isinstance(item, dict) and "name" in item:
+            ingredients.append(IngredientItem(
+                name=item["name"],
+                amount=item.get("amount"),
+                unit=item.get("unit")
+            ))
+    return ingredients
+
+
+def merge_ingredients(ingredient_lists: List[List[IngredientItem]]) -> List[IngredientItem]:
+    """
+    Merges per-image ingredient lists and removes duplicates by normalized name.
+    
+    The first occurrence wins; a missing amount/unit is filled in from a later
+    occurrence of the same ingredient.
+    
+    Args:
+        ingredient_lists: One ingredient list per analyzed image
+        
+    Returns:
+        List[IngredientItem]: De-duplicated ingredients in order of first appearance
+    """
+    merged: Dict[str, IngredientItem] = {}
+    for ingredients in ingredient_lists:
+        for item in ingredients:
+            key = cache.normalize_ingredient_name(item.name)
+            if not key:
+                continue
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = item.model_copy()
+            elif existing.amount is None and item.amount is not None:
+                existing.amount = item.amount
+                existing.unit = item.unit
+    return list(merged.values())
+
+
+async def analyze_images(base64_images: List[str]) -> IngredientsResponse:
     """
     Analyzes one or more images and extracts food ingredients.
     
+    Each image is downscaled and re-encoded first (see image_processing) and
+    looked up in the perceptual-hash cache; the remaining images are analyzed
+    concurrently (at most
+    IMAGE_ANALYSIS_CONCURRENCY at a time) and the results are merged into
+    one ingredient list.
+    
     Args:
         base64_images: List of Base64-encoded images
         
@@ -80,57 +394,62 @@ def analyze_images(base64_images: List[str]) -> IngredientsResponse:
         )
     
     try:
-        # We use the first image for analysis
-        base64_image = base64_images[0]
+        semaphore = asyncio.Semaphore(IMAGE_ANALYSIS_CONCURRENCY)
         
-        # System prompt for ingredient detection
-        prompt = """Analyze this image of a refrigerator or kitchen and identify all 
-        visible food items and ingredients. If possible, also provide quantities and units.
+        prepared_images = []
         
-        Answer with a JSON list in the following format:
-        [
-            {"name": "Ingredient1", "amount": "Quantity1", "unit": "Unit1"},
-            {"name": "Ingredient2", "amount": "Quantity2", "unit": "Unit2"},
-            ...
-        ]
-        
-        If quantity or unit cannot be determined, omit the corresponding fields.
-        Answer ONLY with the JSON list, without additional text."""
+        async def analyze(base64_image: str) -> List[IngredientItem]:
+            async with semaphore:
+                prepared = await image_processing.prepare_image_async(
+                    base64_image, compute_hash=image_result_cache.enabled
+                )
+                prepared_images.append(prepared)
+                
+                # Bereits gesehenes (oder sehr ähnliches) Bild: Ergebnis aus dem Cache
+                if prepared.phash is not None:
+                    cached = await image_result_cache.lookup(prepared.phash)
+                    if cached is not None:
+                        return cached
+                
+                async def detect() -> List[IngredientItem]:
+                    ingredients = await detect_ingredients_in_image(prepared.data, prepared.mime_type)
+                    if prepared.phash is not None:
+                        await image_result_cache.store(prepared.phash, ingredients)
+                    return ingredients
+                
+                # Dasselbe Bild in parallelen Anfragen nur einmal analysieren
+                return await llm_flights.do(prepared.content_key, detect)
         
-        # Rufe die LangChain-Funktion auf
-        result = process_image_with_langchain(prompt, base64_image)
+        results = await asyncio.gather(
+            *(analyze(image) for image in base64_images),
+            return_exceptions=True
+        )
+        bytes_saved = sum(image.bytes_saved for image in prepared_images)
         
-        # Überprüfe ob das Ergebnis eine Liste ist
-        if not isinstance(result, list):
-            # Wenn nicht, versuche, es als Objekt zu interpretieren
-            if isinstance(result, dict) and "ingredients" in result:
-                result = result["ingredients"]
-            else:
-                raise ValueError(f"Ungültiges Antwortformat: {result}")
+        failures = [r for r in results if isinstance(r, Exception)]
+        if len(failures) == len(results):
+            # Alle Bilder sind fehlgeschlagen: ersten Fehler weiterreichen
+            raise failures[0]
         
-        # Konvertiere die erkannten Zutaten in IngredientItem-Objekte
-        ingredients = []
-        for item in result:
-            if isinstance(item, dict) and "name" in item:
-                ingredients.append(IngredientItem(
-                    name=item["name"],
-                    amount=item.get("amount"),
-                    unit=item.get("unit")
-                ))
-
+        ingredients = merge_ingredients([r for r in results if not isinstance(r, Exception)])
         
         # Create the response
         if ingredients:
+            message = f"{len(ingredients)} ingredients detected"
+            if failures:
+                message += f" ({len(failures)} of {len(results)} images could not be analyzed)"
             return IngredientsResponse(
                 success=True,
-                message=f"{len(ingredients)} ingredients detected",
-                ingredients=ingredients
+                message=message,
+                ingredients=ingredients,
+                bytes_saved=bytes_saved
             )
         else:
             return IngredientsResponse(
                 success=False,
                 message="No ingredients detected",
-                error="The AI could not identify any food ingredients in the image"
+                error="The AI could not identify any food ingredients in the images",
+                bytes_saved=bytes_saved
             )
     
     except Exception as e:
@@ -142,7 +461,7 @@ def analyze_images(base64_images: List[str]) -> IngredientsResponse:
         )
 
 
-def generate_recipes(ingredients: List[str]) -> List[str]:
+async def generate_recipes(ingredients: List[str]) -> List[str]:
     """
     Generates a list of recipe suggestions based on the given ingredients.
     
@@ -155,6 +474,19 @@ def generate_recipes(ingredients: List[str]) -> List[str]:
     if not ingredients or len(ingredients) == 0:
         return ["No ingredients provided"]
     
+    cache_key = cache.recipe_list_key(ingredients)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        _notify_recipe_list(cached, ingredients)
+        return cached
+    
+    return await llm_flights.do(cache_key, lambda: _request_recipes(ingredients, cache_key))
+
+
+async def _request_recipes(ingredients: List[str], cache_key: str) -> List[str]:
+    """
+    Asks the LLM for recipe titles and caches a successfully parsed list.
+    """
     try:
         # Format the ingredient list for the prompt
         ingredients_text = ", ".join(ingredients)
@@ -179,7 +511,7 @@ def generate_recipes(ingredients: List[str]) -> List[str]:
         human_message = HumanMessage(content=prompt)
         
         # Invoke the LLM with the messages
-        response = llm.invoke([system_message, human_message])
+        response = await invoke_llm([system_message, human_message], function="generate_recipes")
         content = response.content
     
         
@@ -188,18 +520,7 @@ def generate_recipes(ingredients: List[str]) -> List[str]:
             return ["No recipes found. Please try again with different ingredients."]
             
         # Bereinige den Inhalt von Markdown-Formatierungen
-        # Entferne ```json oder ``` am Anfang und Ende der Antwort
-        if content.strip().startswith("```"):
-            # Finde den Index des ersten Zeilenumbruchs nach den Backticks
-            first_line_break = content.find("\n")
-            if first_line_break != -1:
-                # Entferne die erste Zeile mit den Backticks
-                content = content[first_line_break:].strip()
-            
-            # Entferne auch abschließende Backticks, falls vorhanden
-            if content.strip().endswith("```"):
-                content = content.strip()[:-3].strip()
-                
+        content = strip_markdown_fences(content)
         
         try:
             # Parse the response as JSON
@@ -208,7 +529,10 @@ def generate_recipes(ingredients: List[str]) -> List[str]:
             # Ensure the result is a list of strings
             if isinstance(recipe_list, list):
                 # Take up to 5 recipes
-                return recipe_list[:5]
+                recipe_list = recipe_list[:5]
+                await response_cache.set(cache_key, recipe_list)
+                _notify_recipe_list(recipe_list, ingredients)
+                return recipe_list
             else:
                 return ["Unable to generate recipes. Please try with different ingredients."]
                 
@@ -226,11 +550,144 @@ def generate_recipes(ingredients: List[str]) -> List[str]:
             return ["Error parsing recipes. Please try again."]
             
     except Exception as e:
+        # LLM nicht erreichbar: passende Rezepte aus der Datenbank vorschlagen
+        print(f"Warning: recipe generation failed: {e}")
+        fallback = await resilience.fallbacks.get("generate_recipes", ingredients)
+        if fallback:
+            return fallback
         # In case of error, return a descriptive message
         return ["Unable to generate recipes. Please try again."]
 
 
-def generate_recipe_details(recipe_title: str, ingredients: List[str]) -> Dict[str, Any]:
+def strip_markdown_fences(content: str) -> str:
+    """
+    Removes ```json / ``` fences around an LLM answer, if present.
+    """
+    # Entferne ```json oder ``` am Anfang und Ende der Antwort
+    if content.strip().startswith("```"):
+        # Finde den Index des ersten Zeilenumbruchs nach den Backticks
+        first_line_break = content.find("\n")
+        if first_line_break != -1:
+            # Entferne die erste Zeile mit den Backticks
+            content = content[first_line_break:].strip()
+        
+        # Entferne auch abschließende Backticks, falls vorhanden
+        if content.strip().endswith("```"):
+            content = content.strip()[:-3].strip()
+    return content
+
+
+def build_recipe_details_messages(recipe_title: str, ingredients: List[str]) -> list:
+    """
+    Builds the chat messages for detailed recipe generation.
+    """
+    # Format the ingredient list for the prompt
+    ingredients_text = ", ".join(ingredients)
+    
+    # Create a prompt for detailed recipe generation
+    prompt = f"""Generate a complete recipe for "{recipe_title}" using these available ingredients: {ingredients_text}.
+    You can assume basic pantry items like salt, pepper, oil, common spices, and water are available.
+    
+    The recipe should be practical and easy to follow for home cooks.
+    European measurements are preferred (grams, liters, etc.).
+    
+    Please format your response as a JSON object with the following structure:
+    {{
+        "title": "Recipe Title",
+        "description": "A brief description of the dish",
+        "prepTime": "Preparation time in minutes",
+        "cookTime": "Cooking time in minutes",
+        "servings": "Number of servings",
+        "ingredients": [
+            {{"name": "Ingredient 1", "measure": "measure"}},
+            {{"name": "Ingredient 2", "measure": "measure"}},
+            ...
+        ],
+        "instructions": [
+            "Step 1 instruction",
+            "Step 2 instruction",
+            ...
+        ],
+        "tips": "Optional cooking tips"
+    }}
+    """
+    
+    # Call the LLM without an image
+    system_message = SystemMessage(
+        content="You are a professional chef. Respond with valid JSON only."
+    )
+    
+    return [system_message, HumanMessage(content=prompt)]
+
+
+def parse_recipe_details(content: str, recipe_title: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parses the LLM answer for a detailed recipe.
+    
+    Args:
+        content: Raw LLM answer
+        recipe_title: Requested recipe title (used for fallbacks)
+        
+    Returns:
+        Tuple[Dict, bool]: The recipe details and whether parsing succeeded
+    """
+    # Prüfen, ob der Inhalt leer ist
+    if not content or content.isspace():
+        return {
+            "title": recipe_title,
+            "error": "Empty response from AI service",
+            "ingredients": [],
+            "instructions": ["Unable to generate recipe instructions. Please try again."]
+        }, False
+        
+    # Bereinige den Inhalt von Markdown-Formatierungen
+    content = strip_markdown_fences(content)
+    
+    try:
+        # Parse the response as JSON
+        recipe_details = json.loads(content)
+        
+        # Stellen Sie sicher, dass alle erforderlichen Felder vorhanden sind
+        required_fields = ["title", "ingredients", "instructions"]
+        for field in required_fields:
+            if field not in recipe_details:
+                recipe_details[field] = [] if field in ["ingredients", "instructions"] else recipe_title
+        
+        return recipe_details, True
+            
+    except json.JSONDecodeError as json_err:
+        
+        # Versuche, zumindest die Anweisungen aus dem Text zu extrahieren
+        instructions = []
+        if "1." in content or "Step 1" in content:
+            # Versuche, die Anweisungen zu extrahieren
+            import re
+            steps = re.split(r'\d+\.|\nStep \d+:', content)
+            if len(steps) > 1:
+                instructions = [step.strip() for step in steps[1:] if step.strip()]
+        
+        return {
+            "title": recipe_title,
+            "error": f"Error parsing recipe details: {str(json_err)}",
+            "description": "We had trouble formatting this recipe properly.",
+            "ingredients": [],
+            "instructions": instructions if instructions else ["Unable to generate recipe instructions. Please try again."]
+        }, False
+
+
+def recipe_details_error(recipe_title: str, error: Exception) -> Dict[str, Any]:
+    """
+    Builds the error response for a failed recipe generation.
+    """
+    return {
+        "title": recipe_title,
+        "error": f"Error generating recipe details: {str(error)}",
+        "ingredients": [],
+        "instructions": ["Unable to generate recipe instructions. Please try again."]
+    }
+
+
+async def generate_recipe_details(recipe_title: str, ingredients: List[str]) -> Dict[str, Any]:
     """
     Generates detailed recipe information based on the recipe title and available ingredients.
     
@@ -244,111 +701,93 @@ def generate_recipe_details(recipe_title: str, ingredients: List[str]) -> Dict[s
     if not recipe_title:
         return {"error": "No recipe title provided"}
     
+    cache_key = cache.recipe_details_key(recipe_title, ingredients)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    return await llm_flights.do(cache_key, lambda: _request_recipe_details(recipe_title, ingredients, cache_key))
+
+
+async def _request_recipe_details(recipe_title: str, ingredients: List[str], cache_key: str) -> Dict[str, Any]:
+    """
+    Asks the LLM for a detailed recipe and caches a successfully parsed result.
+    """
     try:
-        # Format the ingredient list for the prompt
-        ingredients_text = ", ".join(ingredients)
-        
-        # Create a prompt for detailed recipe generation
-        prompt = f"""Generate a complete recipe for "{recipe_title}" using these available ingredients: {ingredients_text}.
-        You can assume basic pantry items like salt, pepper, oil, common spices, and water are available.
-        
-        The recipe should be practical and easy to follow for home cooks.
-        European measurements are preferred (grams, liters, etc.).
-        
-        Please format your response as a JSON object with the following structure:
-        {{
-            "title": "Recipe Title",
-            "description": "A brief description of the dish",
-            "prepTime": "Preparation time in minutes",
-            "cookTime": "Cooking time in minutes",
-            "servings": "Number of servings",
-            "ingredients": [
-                {{"name": "Ingredient 1", "measure": "measure"}},
-                {{"name": "Ingredient 2", "measure": "measure"}},
-                ...
-            ],
-            "instructions": [
-                "Step 1 instruction",
-                "Step 2 instruction",
-                ...
-            ],
-            "tips": "Optional cooking tips"
-        }}
-        """
-        
-        # Call the LLM without an image
-        system_message = SystemMessage(
-            content="You are a professional chef. Respond with valid JSON only."
-        )
-        
-        human_message = HumanMessage(content=prompt)
-        
         # Invoke the LLM with the messages
-        response = llm.invoke([system_message, human_message])
-        content = response.content
-    
-        
-        # Prüfen, ob der Inhalt leer ist
-        if not content or content.isspace():
-            return {
-                "title": recipe_title,
-                "error": "Empty response from AI service",
-                "ingredients": [],
-                "instructions": ["Unable to generate recipe instructions. Please try again."]
-            }
-            
-        # Bereinige den Inhalt von Markdown-Formatierungen
-        # Entferne ```json oder ``` am Anfang und Ende der Antwort
-        if content.strip().startswith("```"):
-            # Finde den Index des ersten Zeilenumbruchs nach den Backticks
-            first_line_break = content.find("\n")
-            if first_line_break != -1:
-                # Entferne die erste Zeile mit den Backticks
-                content = content[first_line_break:].strip()
-            
-            # Entferne auch abschließende Backticks, falls vorhanden
-            if content.strip().endswith("```"):
-                content = content.strip()[:-3].strip()
-                
+        response = await invoke_llm(
+            build_recipe_details_messages(recipe_title, ingredients), function="generate_recipe_details"
+        )
         
-        try:
-            # Parse the response as JSON
-            recipe_details = json.loads(content)
-            
-            # Stellen Sie sicher, dass alle erforderlichen Felder vorhanden sind
-            required_fields = ["title", "ingredients", "instructions"]
-            for field in required_fields:
-                if field not in recipe_details:
-                    recipe_details[field] = [] if field in ["ingredients", "instructions"] else recipe_title
-            
-            return recipe_details
-                
-        except json.JSONDecodeError as json_err:
-            
-            # Versuche, zumindest die Anweisungen aus dem Text zu extrahieren
-            instructions = []
-            if "1." in content or "Step 1" in content:
-                # Versuche, die Anweisungen zu extrahieren
-                import re
-                steps = re.split(r'\d+\.|\nStep \d+:', content)
-                if len(steps) > 1:
-                    instructions = [step.strip() for step in steps[1:] if step.strip()]
-            
-            return {
-                "title": recipe_title,
-                "error": f"Error parsing recipe details: {str(json_err)}",
-                "description": "We had trouble formatting this recipe properly.",
-                "ingredients": [],
-                "instructions": instructions if instructions else ["Unable to generate recipe instructions. Please try again."]
-            }
+        recipe_details, parsed = parse_recipe_details(response.content, recipe_title)
+        if parsed:
+            await response_cache.set(cache_key, recipe_details)
+        return recipe_details
             
     except Exception as e:
+        # LLM nicht erreichbar: gespeichertes Rezept mit diesem Titel verwenden
+        print(f"Warning: recipe details generation failed: {e}")
+        fallback = await resilience.fallbacks.get("generate_recipe_details", recipe_title, ingredients)
+        if fallback:
+            return fallback
         # In case of error, return a descriptive error message
-        error_msg = f"Error generating recipe details: {str(e)}"
-        return {
-            "title": recipe_title,
-            "error": error_msg,
-            "ingredients": [],
-            "instructions": ["Unable to generate recipe instructions. Please try again."]
-        }
+        return recipe_details_error(recipe_title, e)
+
 
+async def stream_recipe_details(recipe_title: str, ingredients: List[str]) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Generates a detailed recipe and yields it piece by piece while the LLM
+    is still writing.
+    
+    Events are `(name, data)` tuples: one event per top-level field (e.g.
+    "title", "description"), one "ingredient" / "instruction" event per list
+    entry, and finally "done" with the complete recipe (or "error").
+    
+    Args:
+        recipe_title: The name/title of the recipe to generate
+        ingredients: List of ingredient names available to the user
+    """
+    if not recipe_title:
+        yield "error", {"error": "No recipe title provided"}
+        return
+    
+    emitter = streaming.RecipeEventEmitter()
+    
+    cache_key = cache.recipe_details_key(recipe_title, ingredients)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        for event in emitter.update(cached, final=True):
+            yield event
+        yield "done", cached
+        return
+    
+    content = ""
+    try:
+        async for chunk in stream_llm(
+            build_recipe_details_messages(recipe_title, ingredients), function="stream_recipe_details"
+        ):
+            if not chunk.content:
+                continue
+            content += chunk.content
+            for event in emitter.update(streaming.parse_partial_json(content)):
+                yield event
+    except Exception as e:
+        print(f"Warning: recipe details stream failed: {e}")
+        # Ersatz nur, solange noch nichts vom LLM ausgeliefert wurde
+        fallback = None
+        if not content:
+            fallback = await resilience.fallbacks.get("generate_recipe_details", recipe_title, ingredients)
+        if not fallback:
+            yield "error", recipe_details_error(recipe_title, e)
+            return
+        for event in emitter.update(fallback, final=True):
+            yield event
+        yield "done", fallback
+        return
+    
+    recipe_details, parsed = parse_recipe_details(content, recipe_title)
+    if parsed:
+        await response_cache.set(cache_key, recipe_details)
+        for event in emitter.update(recipe_details, final=True):
+            yield event
+    yield "done", recipe_details
@@ -1,15 +1,35 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from typing import List, Optional
+from typing import List, Optional, Union
 import os
 from dotenv import load_dotenv
-from models import Recipe
+from models import Recipe, RecipeMatch, RecipeSummary
 from image_models import ImageUpload
 from ingredient_models import IngredientsResponse, IngredientItem
 import llm_service
+import cache
+import image_processing
+import image_cache
+import streaming
+import search as search_module
+import search_engine
+import pagination
+import facets
+import http_cache
+import random_picker
+import recipe_documents
+import highlights
+import fast_json
+import indexes
+import database
+import metrics
+import ingredient_matcher
+import prefetch
+import generated_recipes
+import resilience
 
 # Lade die Umgebungsvariablen
 load_dotenv()
@@ -33,8 +53,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Latenz pro Route (Routen-Template statt konkreter URL, z.B. /recipes/{recipe_id})
+app.add_middleware(metrics.RequestLatencyMiddleware)
+
+# Abschnitte von /stats zusätzlich als Gauges unter /metrics
+metrics.register_stats("llm", llm_service.get_llm_stats)
+metrics.register_stats("coalescing", llm_service.llm_flights.stats)
+metrics.register_stats("cache", llm_service.response_cache.stats, labels={"hits": "tier"})
+metrics.register_stats("images", image_processing.image_stats.stats)
+metrics.register_stats("image_cache", llm_service.image_result_cache.stats)
+metrics.register_stats("search_engine", search_engine.engine.stats)
+metrics.register_stats("facets", facets.facet_service.stats)
+metrics.register_stats("random", random_picker.random_picker.stats)
+metrics.register_stats("highlights", highlights.highlights_feed.stats)
+metrics.register_stats("matcher", ingredient_matcher.ingredient_matcher.stats)
+metrics.register_stats("prefetch", prefetch.detail_prefetcher.stats)
+metrics.register_stats("generated", generated_recipes.generated_store.stats)
+metrics.register_stats(
+    "resilience", resilience.stats,
+    labels={"fallbacks_served": "operation", "fallbacks_missed": "operation"},
+)
+
+# Ersatzantworten aus der Datenbank, solange das LLM nicht erreichbar ist
+resilience.fallbacks.register("generate_recipes", ingredient_matcher.fallback_titles)
+resilience.fallbacks.register("generate_recipe_details", generated_recipes.fallback_details)
+
+# Details zu neu vorgeschlagenen Titeln im Hintergrund vorab generieren (PREFETCH_ENABLED)
+llm_service.recipe_list_listeners.append(prefetch.detail_prefetcher.schedule)
+metrics.register_stats("mongo_pool", database.pool_stats.stats, labels={"servers": "server"})
+
 # MongoDB-Verbindungseinstellungen
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "mealmate")
@@ -42,8 +92,44 @@ DB_NAME = os.getenv("DB_NAME", "mealmate")
 # MongoDB-Verbindung
 @app.on_event("startup")
 async def startup_db_client():
-    app.mongodb_client = AsyncIOMotorClient(MONGODB_URL)
+    app.mongodb_client = database.create_client(MONGODB_URL, listeners=[metrics.command_timer])
     app.mongodb = app.mongodb_client[DB_NAME]
+    # Lesende Rezept-Endpunkte dürfen (je nach MONGO_READ_PREFERENCE) von Secondaries lesen
+    app.mongodb_read = app.mongodb_client.get_database(DB_NAME, read_preference=database.read_preference())
+    
+    # Gemeinsame Cache-Stufe in MongoDB für alle Worker
+    if cache.CACHE_MONGO_ENABLED:
+        mongo_cache = cache.MongoCache(app.mongodb[cache.CACHE_COLLECTION])
+        await mongo_cache.ensure_indexes()
+        llm_service.response_cache.add_tier(mongo_cache)
+    
+    # Cache der Zutatenerkennung (Perceptual Hash) in MongoDB
+    if llm_service.image_result_cache.enabled:
+        llm_service.image_result_cache.attach(app.mongodb[image_cache.IMAGE_CACHE_COLLECTION])
+        await llm_service.image_result_cache.ensure_indexes()
+    
+    # Indexe der Rezept-Collection anlegen/prüfen und Ausführungspläne loggen
+    try:
+        await indexes.check_recipe_indexes(app.mongodb["recipes"])
+    except Exception as e:
+        print(f"Warning: could not check indexes: {e}")
+    
+    # In-Memory-Suchindex laden (Suchmodus "memory")
+    if search_engine.SEARCH_ENGINE_ENABLED:
+        try:
+            await search_engine.engine.start(app.mongodb_read["recipes"])
+        except Exception as e:
+            print(f"Warning: could not load search index: {e}")
+    
+    # Facetten (Kategorien/Regionen) werden bei Bedarf aus dieser Collection berechnet
+    facets.facet_service.attach(app.mongodb_read["recipes"])
+    random_picker.random_picker.attach(app.mongodb_read["recipes"])
+    # Generierte Rezepte werden geschrieben und direkt wieder gelesen (Primary)
+    generated_recipes.generated_store.attach(app.mongodb["recipes"])
+    
+    # Highlight-Feed und Zutatenindex vorladen und regelmäßig aktualisieren
+    await highlights.highlights_feed.start(app.mongodb_read["recipes"])
+    await ingredient_matcher.ingredient_matcher.start(app.mongodb_read["recipes"])
     
     # Erstelle Upload-Verzeichnis, falls es nicht existiert
     UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
@@ -51,18 +137,37 @@ async def startup_db_client():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await search_engine.engine.stop()
+    await highlights.highlights_feed.stop()
+    await ingredient_matcher.ingredient_matcher.stop()
     app.mongodb_client.close()
 
 # Endpunkte für Rezepte
-@app.get("/recipes", response_model=List[Recipe])
+def _summary_response(recipes: List[dict], headers: Optional[dict] = None) -> JSONResponse:
+    """
+    Antwort für view=summary: validiert nur das schlanke RecipeSummary-Modell und
+    umgeht die Validierung gegen das vollständige Recipe-Modell.
+    """
+    content = [
+        RecipeSummary(**recipe_documents.to_summary(recipe)).model_dump(mode="json", by_alias=True)
+        for recipe in recipes
+    ]
+    return JSONResponse(content, headers=headers)
+
+@app.get("/recipes", response_model=Union[List[Recipe], List[RecipeSummary]])
 async def get_recipes(
+    response: Response,
     skip: int = 0, 
     limit: int = 10,
     search: Optional[str] = None,
     category: Optional[str] = None,
     area: Optional[str] = None,
     sort_by: Optional[str] = None,
-    sort_dir: Optional[str] = "asc"
+    sort_dir: Optional[str] = "asc",
+    mode: Optional[str] = None,
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern=recipe_documents.VIEW_PATTERN),
+    max_minutes: Optional[int] = Query(None, ge=0)
 ):
     """
     Holt eine Liste von Rezepten mit gleichzeitiger Filterung, Sortierung und Paginierung.
@@ -72,175 +177,146 @@ async def get_recipes(
     - area: Nach Herkunftsregion filtern (z.B. Greek, Italian)
     - sort_by: Sortierfeld (title, cookingTime, servings)
     - sort_dir: Sortierrichtung (asc, desc)
+    - mode: Suchmodus (regex, text, memory), Standard aus SEARCH_MODE
+    - cursor: Cursor aus dem Header "X-Next-Cursor" der vorherigen Seite (ersetzt skip)
+    - view: "full" (vollständige Rezepte) oder "summary" (nur Kartenfelder, siehe RecipeSummary)
+    - max_minutes: Nur Rezepte mit höchstens so vielen Minuten Kochzeit
     """
     query = {}
-    pipeline = []
+    next_page = None
     
     # Kategorie- und Bereichsfilter anwenden (unabhängig vom Suchbegriff)
     if category:
-        query["category"] = {"$regex": category, "$options": "i"}
+        query["category"] = search_module.contains(category)
     
     if area:
-        query["area"] = {"$regex": area, "$options": "i"}
+        query["area"] = search_module.contains(area)
     
-    if search:
-        # Wenn ein Suchbegriff vorhanden ist, berechnen wir eine Relevanz
-        search_regex = {"$regex": search, "$options": "i"}
-        
-        # Grundlegende Suche über mehrere Felder
-        search_query = {
-            "$or": [
-                {"title": search_regex},
-                {"tags": search_regex},
-                {"category": search_regex},
-                {"area": search_regex},
-                {"ingredients.name": search_regex}
-            ]
-        }
-        
-        # Kombiniere Suchfilter mit Kategorie/Bereichsfilter
-        if query:
-            # Wenn bereits Filter existieren, wende sie zusammen mit der Suche an
-            query = {"$and": [query, search_query]}
-        else:
-            # Wenn keine Filter existieren, verwende nur die Suche
-            query = search_query
+    if max_minutes is not None:
+        query["cookingMinutes"] = {"$lte": max_minutes}
+    
+    # cookingTime/servings numerisch über cookingMinutes/servingsCount sortieren
+    if sort_by:
+        sort_by = recipe_documents.sort_field(sort_by)
+    
+    # 1 für aufsteigend, -1 für absteigend
+    sort_direction = 1 if sort_dir.lower() == "asc" else -1
+    search_mode = search_module.resolve_mode(mode) if search else None
+    
+    if search_mode == "memory":
+        # Suche komplett im In-Memory-Index beantworten
+        offset = pagination.decode_offset_cursor(cursor) if cursor else skip
+        total, recipes = search_engine.engine.query(
+            search, category, area, sort_by, sort_dir, offset, limit, max_minutes
+        )
+        next_page = pagination.offset_cursor(offset + len(recipes), total)
+    elif search and not sort_by:
+        # Suchfilter (Regex oder Textindex) mit Kategorie/Bereichsfilter kombinieren
+        query = search_module.search_filter(search, search_mode, query)
         
         # Wenn keine Sortierung angegeben wurde, nach Relevanz sortieren
-        if not sort_by:
-            # Aggregation-Pipeline verwenden, um Relevanz zu berechnen
-            pipeline = [
-                {"$match": query},
-                # Relevanz-Score berechnen basierend auf wo der Suchbegriff vorkommt
-                {"$addFields": {
-                    "relevanceScore": {
-                        "$sum": [
-                            # Treffer im Titel haben höchste Priorität
-                            {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$title", ""]}, "regex": search, "options": "i"}}, 10, 0]},
-                            # Treffer in Kategorie haben zweithöchste Priorität
-                            {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$category", ""]}, "regex": search, "options": "i"}}, 8, 0]},
-                            # Treffer in Herkunftsregion
-                            {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$area", ""]}, "regex": search, "options": "i"}}, 7, 0]},
-                            # Treffer in Tags
-                            {"$cond": [{"$anyElementTrue": {
-                                "$map": {
-                                    "input": {"$ifNull": ["$tags", []]},
-                                    "as": "tag",
-                                    "in": {"$regexMatch": {"input": "$$tag", "regex": search, "options": "i"}}
-                                }
-                            }}, 5, 0]},
-                            # Zählen wie viele Zutaten übereinstimmen (weniger wichtig)
-                            {"$size": {"$filter": {
-                                "input": {"$ifNull": ["$ingredients", []]},
-                                "as": "ingredient",
-                                "cond": {"$regexMatch": {"input": "$$ingredient.name", "regex": search, "options": "i"}}
-                            }}}
-                        ]
-                    }
-                }},
-                {"$sort": {"relevanceScore": -1, "title": 1}},
-                {"$skip": skip},
-                {"$limit": limit}
-            ]
-            
-            # Aggregations-Pipeline für relevanzbasierte Suche verwenden
-            recipes = await app.mongodb["recipes"].aggregate(pipeline).to_list(limit)
-        else:
-            # Fall back auf normale Suche mit expliziter Sortierung
-            cursor = app.mongodb["recipes"].find(query)
-            
-            # Sortieroption vorbereiten
-            sort_options = {}
-            # 1 für aufsteigend, -1 für absteigend
-            sort_direction = 1 if sort_dir.lower() == "asc" else -1
-            sort_options = {sort_by: sort_direction}
-            cursor = cursor.sort(list(sort_options.items()))
-            
-            recipes = await cursor.skip(skip).limit(limit).to_list(limit)
-    else:
-        # Wenn kein Suchbegriff vorhanden ist, wende nur die Kategorie/Bereichsfilter an (diese wurden bereits oben gesetzt)
+        spec = pagination.sort_spec(("relevanceScore", -1), ("title", 1))
+        pipeline = [
+            {"$match": query},
+            # Relevanz-Score berechnen basierend auf wo der Suchbegriff vorkommt
+            search_module.relevance_stage(search, search_mode),
+            *pagination.page_stages(spec, cursor, skip, limit)
+        ]
+        projection = recipe_documents.projection_for(view, *(field for field, _ in spec))
+        if projection:
+            pipeline.append({"$project": projection})
         
-        # Sortieroption vorbereiten
-        cursor = app.mongodb["recipes"].find(query)
+        # Aggregations-Pipeline für relevanzbasierte Suche verwenden
+        recipes = await app.mongodb_read["recipes"].aggregate(pipeline).to_list(limit)
+        next_page = pagination.next_cursor(recipes, spec, limit)
+    else:
+        if search:
+            query = search_module.search_filter(search, search_mode, query)
         
-        if sort_by:
-            # 1 für aufsteigend, -1 für absteigend
-            sort_direction = 1 if sort_dir.lower() == "asc" else -1
-            sort_options = {sort_by: sort_direction}
-            cursor = cursor.sort(list(sort_options.items()))
-        else:
-            # Standardsortierung nach Titel
-            cursor = cursor.sort("title", 1)
+        # Explizite Sortierung oder Standardsortierung nach Titel
+        spec = pagination.sort_spec((sort_by, sort_direction) if sort_by else ("title", 1))
+        if cursor:
+            # Keyset-Paginierung: nur Dokumente nach dem letzten Sortierschlüssel
+            keyset = pagination.keyset_filter(spec, pagination.decode_cursor(cursor, spec))
+            query = {"$and": [query, keyset]} if query else keyset
         
-        recipes = await cursor.skip(skip).limit(limit).to_list(limit)
+        projection = recipe_documents.projection_for(view, *(field for field, _ in spec))
+        db_cursor = app.mongodb_read["recipes"].find(query, projection).sort(spec)
+        if skip and not cursor:
+            db_cursor = db_cursor.skip(skip)
+        recipes = await db_cursor.limit(limit).to_list(limit)
+        next_page = pagination.next_cursor(recipes, spec, limit)
     
     # Konvertiere ObjectId zu String und stelle sicher, dass cookingTime und servings Strings sind
     for recipe in recipes:
-        recipe["_id"] = str(recipe["_id"])
-        
-        # Konvertiere cookingTime zu String, falls es eine Zahl ist
-        if "cookingTime" in recipe and not isinstance(recipe["cookingTime"], str):
-            recipe["cookingTime"] = f"{recipe['cookingTime']} Min"
-            
-        # Konvertiere servings zu String, falls es eine Zahl ist
-        if "servings" in recipe and not isinstance(recipe["servings"], str):
-            recipe["servings"] = f"{recipe['servings']} servings"
+        recipe_documents.prepare_for_response(recipe)
     
+    headers = {"X-Next-Cursor": next_page} if next_page else {}
+    if view == "summary":
+        return _summary_response(recipes, headers)
+    if fast_json.FAST_JSON_ENABLED:
+        return fast_json.recipes_response(recipes, headers)
+    
+    response.headers.update(headers)
     return recipes
 
-@app.get('/recipes/highlights', response_model=List[Recipe])
-async def get_highlighted_recipes():
+@app.get('/recipes/highlights', response_model=Union[List[Recipe], List[RecipeSummary]])
+async def get_highlighted_recipes(request: Request, view: str = Query("full", pattern=recipe_documents.VIEW_PATTERN)):
     """
     Liefert alle hervorgehobenen Rezepte (mit highlight=True).
-    """
-    recipes = await app.mongodb["recipes"].find({"highlight": True}).to_list(100)
     
-    # Konvertiere ObjectId zu String und stelle sicher, dass cookingTime und servings Strings sind
-    for recipe in recipes:
-        recipe["_id"] = str(recipe["_id"])
-        
-        # Konvertiere cookingTime zu String, falls es eine Zahl ist
-        if "cookingTime" in recipe and not isinstance(recipe["cookingTime"], str):
-            recipe["cookingTime"] = f"{recipe['cookingTime']} Min"
-            
-        # Konvertiere servings zu String, falls es eine Zahl ist
-        if "servings" in recipe and not isinstance(recipe["servings"], str):
-            recipe["servings"] = f"{recipe['servings']} servings"
+    Der Feed wird im Speicher vorgehalten und regelmäßig aktualisiert; die
+    Antwort unterstützt ETag/If-None-Match (304).
     
-    return recipes
+    - view: "full" (vollständige Rezepte) oder "summary" (nur Kartenfelder)
+    """
+    version = highlights.highlights_feed.get(view)
+    if version is None:
+        raise HTTPException(status_code=503, detail="Highlights werden noch geladen")
+    return http_cache.conditional_response(request, version.body, version.etag, highlights.HIGHLIGHTS_MAX_AGE)
 
-@app.get('/recipes/random', response_model=List[Recipe])
-async def get_random_recipes(limit: int = 5, category: Optional[str] = None):
+@app.get('/recipes/random', response_model=Union[List[Recipe], List[RecipeSummary]])
+async def get_random_recipes(
+    limit: int = 5,
+    category: Optional[str] = None,
+    seed: Optional[str] = None,
+    view: str = Query("full", pattern=recipe_documents.VIEW_PATTERN)
+):
     """
     Liefert eine zufällige Auswahl von Rezepten.
     
     - limit: Anzahl der zurückzugebenden Rezepte
     - category: Optional, filtert Rezepte nach Kategorie
+    - seed: Optional, liefert für denselben Seed dieselbe Auswahl (z.B. "Rezept des Tages")
+    - view: "full" (vollständige Rezepte) oder "summary" (nur Kartenfelder)
     """
-    # Die MongoDB-Aggregationspipeline für zufällige Dokumente
-    pipeline = []
-    
-    # Füge einen Match-Filter für die Kategorie hinzu, falls angegeben
-    if category:
-        pipeline.append({"$match": {"category": {"$regex": category, "$options": "i"}}})
-    
-    # Füge den Sample-Operator hinzu
-    pipeline.append({"$sample": {"size": limit}})
-    
-    recipes = await app.mongodb["recipes"].aggregate(pipeline).to_list(limit)
+    projection = recipe_documents.projection_for(view)
+    if random_picker.RANDOM_STRATEGY == "pool":
+        # Auswahl aus dem ID-Pool im Speicher, unabhängig von der Größe der Collection
+        recipes = await random_picker.random_picker.pick(limit, category, seed, projection)
+    else:
+        # Die MongoDB-Aggregationspipeline für zufällige Dokumente
+        pipeline = []
+        
+        # Füge einen Match-Filter für die Kategorie hinzu, falls angegeben
+        if category:
+            pipeline.append({"$match": {"category": search_module.contains(category)}})
+        
+        # Füge den Sample-Operator hinzu
+        pipeline.append({"$sample": {"size": limit}})
+        if projection:
+            pipeline.append({"$project": projection})
+        
+        recipes = await app.mongodb_read["recipes"].aggregate(pipeline).to_list(limit)
     
     # Konvertiere ObjectId zu String und stelle sicher, dass cookingTime und servings Strings sind
     for recipe in recipes:
-        recipe["_id"] = str(recipe["_id"])
-        
-        # Konvertiere cookingTime zu String, falls es eine Zahl ist
-        if "cookingTime" in recipe and not isinstance(recipe["cookingTime"], str):
-            recipe["cookingTime"] = f"{recipe['cookingTime']} Min"
-            
-        # Konvertiere servings zu String, falls es eine Zahl ist
-        if "servings" in recipe and not isinstance(recipe["servings"], str):
-            recipe["servings"] = f"{recipe['servings']} servings"
+        recipe_documents.prepare_for_response(recipe)
     
+    if view == "summary":
+        return _summary_response(recipes)
+    if fast_json.FAST_JSON_ENABLED:
+        return fast_json.recipes_response(recipes)
     return recipes
 
 @app.post('/recipes/generate/list', response_model=List[str])
@@ -248,23 +324,58 @@ async def generate_recipe_list(ingredients: List[IngredientItem]):
     """
     Generiert eine Liste von Rezepten basierend auf den angegebenen Zutaten.
     
+    Zuerst werden gespeicherte Rezepte nach Abdeckung durch die Zutaten gesucht;
+    das LLM wird nur gefragt, wenn weniger als MATCH_MIN_RESULTS passende Rezepte
+    gefunden werden.
+    
     - ingredients: Liste von Zutaten
     """
 
     # Konvertiere die Zutaten in ein Format, das vom LLM-Service verarbeitet werden kann
     ingredient_list = [ingredient.name for ingredient in ingredients]
     
+    if ingredient_matcher.MATCH_ENABLED and ingredient_list:
+        try:
+            matches = ingredient_matcher.ingredient_matcher.match(ingredient_list, limit=5)
+            if len(matches) >= ingredient_matcher.MATCH_MIN_RESULTS:
+                # Kein Prefetch: Details zu Katalogtiteln liegen bereits in der Datenbank
+                return [match.title for match in matches]
+        except Exception as e:
+            print(f"Warning: recipe matching failed, falling back to LLM: {e}")
+    
     # Verwende den LLM-Service, um Rezepte zu generieren
-    recipes = llm_service.generate_recipes(ingredient_list)
+    recipes = await llm_service.generate_recipes(ingredient_list)
     
     return recipes
 
-@app.post('/recipes/generate/details')
-async def generate_recipe_details(data: dict):
+@app.post('/recipes/match', response_model=List[RecipeMatch])
+async def match_recipes(
+    ingredients: List[IngredientItem],
+    limit: int = Query(10, ge=1, le=50),
+    min_coverage: float = Query(ingredient_matcher.MATCH_MIN_COVERAGE, ge=0, le=1)
+):
     """
-    Generiert ein detailliertes Rezept basierend auf dem angegebenen Rezepttitel und den verfügbaren Zutaten.
+    Sucht gespeicherte Rezepte, die sich mit den angegebenen Zutaten kochen lassen.
     
-    - data: Dictionary mit "recipe_title" und "ingredients"-Liste
+    Sortiert nach Abdeckung (Anteil vorhandener Rezeptzutaten, Grundzutaten wie
+    Salz und Öl zählen als vorhanden) und Anzahl fehlender Zutaten.
+    
+    - ingredients: Liste von Zutaten
+    - limit: Maximale Anzahl an Rezepten
+    - min_coverage: Mindestabdeckung zwischen 0 und 1
+    """
+    matches = ingredient_matcher.ingredient_matcher.match(
+        [ingredient.name for ingredient in ingredients], limit=limit, min_coverage=min_coverage
+    )
+    return [
+        RecipeMatch(_id=match.id, title=match.title, coverage=match.coverage,
+                    matched=match.matched, missing=match.missing)
+        for match in matches
+    ]
+
+def _parse_generation_request(data: dict):
+    """
+    Prüft den Request-Body der Detail-Generierung und liefert Titel und Zutatennamen.
     """
     if not data or "recipe_title" not in data or "ingredients" not in data:
         raise HTTPException(status_code=400, detail="Rezepttitel und Zutaten sind erforderlich")
@@ -280,11 +391,86 @@ async def generate_recipe_details(data: dict):
         else:
             ingredient_list.append(ingredient)
     
-    # Verwende den LLM-Service, um ein detailliertes Rezept zu generieren
-    recipe_details = llm_service.generate_recipe_details(recipe_title, ingredient_list)
+    return recipe_title, ingredient_list
+
+async def _matched_recipe_details(recipe_title: str) -> Optional[dict]:
+    """
+    Stored recipe for a title suggested by the ingredient matcher, so its
+    details come from the database instead of a new generation.
+    """
+    if not ingredient_matcher.MATCH_ENABLED:
+        return None
+    try:
+        return await ingredient_matcher.ingredient_matcher.stored_details(recipe_title)
+    except Exception as e:
+        print(f"Warning: could not load matched recipe: {e}")
+        return None
+
+@app.post('/recipes/generate/details')
+async def generate_recipe_details(data: dict):
+    """
+    Generiert ein detailliertes Rezept basierend auf dem angegebenen Rezepttitel und den verfügbaren Zutaten.
+    
+    - data: Dictionary mit "recipe_title" und "ingredients"-Liste
+    """
+    recipe_title, ingredient_list = _parse_generation_request(data)
+    
+    # Titel aus dem Zutatenabgleich: das gespeicherte Rezept ausliefern
+    matched = await _matched_recipe_details(recipe_title)
+    if matched is not None:
+        return matched
+    
+    # Im Hintergrund vorab generierte Details (nach /recipes/generate/list)
+    prefetched = await prefetch.detail_prefetcher.take(recipe_title, ingredient_list)
+    if prefetched is not None:
+        return prefetched
+    
+    # Bereits gespeicherte Generierung verwenden, sonst den LLM-Service fragen (und speichern)
+    recipe_details = await generated_recipes.generate_details(recipe_title, ingredient_list)
     
     return recipe_details
 
+@app.post('/recipes/generate/details/stream')
+async def stream_recipe_details(data: dict):
+    """
+    Wie /recipes/generate/details, liefert das Rezept aber als Server-Sent Events,
+    sobald die einzelnen Teile vom LLM geschrieben wurden.
+    
+    - Events: ein Event pro Feld (z.B. "title", "description"), je ein "ingredient"-
+      und "instruction"-Event pro Eintrag, abschließend "done" mit dem vollständigen Rezept
+    - data: Dictionary mit "recipe_title" und "ingredients"-Liste
+    """
+    recipe_title, ingredient_list = _parse_generation_request(data)
+    
+    async def event_stream():
+        stored = await _matched_recipe_details(recipe_title)
+        if stored is None:
+            try:
+                stored = await generated_recipes.generated_store.lookup(recipe_title, ingredient_list)
+            except Exception as e:
+                print(f"Warning: generated recipe lookup failed: {e}")
+        if stored is not None:
+            for event, payload in streaming.RecipeEventEmitter().update(stored, final=True):
+                yield streaming.format_sse(event, payload)
+            yield streaming.format_sse("done", stored)
+            return
+        
+        async for event, payload in llm_service.stream_recipe_details(recipe_title, ingredient_list):
+            if event == "done":
+                try:
+                    recipe_id = await generated_recipes.generated_store.save(recipe_title, ingredient_list, payload)
+                    if recipe_id is not None:
+                        payload = {**payload, "recipeId": recipe_id}
+                except Exception as e:
+                    print(f"Warning: could not store generated recipe: {e}")
+            yield streaming.format_sse(event, payload)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/recipes/{recipe_id}", response_model=Recipe)
 async def get_recipe(recipe_id: str):
     """
@@ -292,22 +478,22 @@ async def get_recipe(recipe_id: str):
     """
     # Versuche zuerst mit ObjectId
     try:
-        recipe = await app.mongodb["recipes"].find_one({"_id": ObjectId(recipe_id)})
+        query = {"_id": ObjectId(recipe_id)}
     except:
         # Falls die ID kein gültiges ObjectId ist, versuche mit der String-ID
-        recipe = await app.mongodb["recipes"].find_one({"idMeal": recipe_id})
+        query = {"idMeal": recipe_id}
+    
+    recipe = await app.mongodb_read["recipes"].find_one(query)
+    if recipe is None and "_id" in query:
+        # Gerade gespeicherte Rezepte (z.B. recipeId aus /recipes/generate/details)
+        # sind auf Secondaries evtl. noch nicht repliziert: Primary fragen
+        recipe = await app.mongodb["recipes"].find_one(query)
     
     if recipe:
-        recipe["_id"] = str(recipe["_id"])
-        
-        # Konvertiere cookingTime zu String, falls es eine Zahl ist
-        if "cookingTime" in recipe and not isinstance(recipe["cookingTime"], str):
-            recipe["cookingTime"] = f"{recipe['cookingTime']} Min"
-            
-        # Konvertiere servings zu String, falls es eine Zahl ist
-        if "servings" in recipe and not isinstance(recipe["servings"], str):
-            recipe["servings"] = f"{recipe['servings']} servings"
-            
+        # Konvertiere ObjectId zu String und stelle sicher, dass cookingTime und servings Strings sind
+        recipe_documents.prepare_for_response(recipe)
+        if fast_json.FAST_JSON_ENABLED:
+            return fast_json.FastJSONResponse(fast_json.recipe_payload(recipe))
         return recipe
     
     raise HTTPException(status_code=404, detail=f"Rezept mit ID {recipe_id} nicht gefunden")
@@ -315,20 +501,55 @@ async def get_recipe(recipe_id: str):
 
 # Weitere Endpunkte
 @app.get("/categories")
-async def get_categories():
+async def get_categories(request: Request):
     """
-    Liefert alle verfügbaren Kategorien.
+    Liefert alle verfügbaren Kategorien mit der Anzahl der Rezepte pro Kategorie.
+    
+    Die Antwort wird im Speicher gehalten und unterstützt ETag/If-None-Match (304).
     """
-    categories = await app.mongodb["recipes"].distinct("category")
-    return {"categories": categories}
+    snapshot = await facets.facet_service.get("category", "categories")
+    return http_cache.conditional_response(request, snapshot.body, snapshot.etag, facets.FACET_MAX_AGE)
 
 @app.get("/areas")
-async def get_areas():
+async def get_areas(request: Request):
+    """
+    Liefert alle verfügbaren Herkunftsregionen mit der Anzahl der Rezepte pro Region.
+    
+    Die Antwort wird im Speicher gehalten und unterstützt ETag/If-None-Match (304).
+    """
+    snapshot = await facets.facet_service.get("area", "areas")
+    return http_cache.conditional_response(request, snapshot.body, snapshot.etag, facets.FACET_MAX_AGE)
+
+@app.get("/stats")
+async def get_stats():
     """
-    Liefert alle verfügbaren Herkunftsregionen.
+    Liefert Laufzeitmetriken des Backends (z.B. Warteschlange der LLM-Aufrufe).
     """
-    areas = await app.mongodb["recipes"].distinct("area")
-    return {"areas": areas}
+    return {
+        "llm": llm_service.get_llm_stats(),
+        "coalescing": llm_service.llm_flights.stats(),
+        "cache": llm_service.response_cache.stats(),
+        "images": image_processing.image_stats.stats(),
+        "image_cache": llm_service.image_result_cache.stats(),
+        "search_engine": search_engine.engine.stats(),
+        "facets": facets.facet_service.stats(),
+        "random": random_picker.random_picker.stats(),
+        "highlights": highlights.highlights_feed.stats(),
+        "matcher": ingredient_matcher.ingredient_matcher.stats(),
+        "prefetch": prefetch.detail_prefetcher.stats(),
+        "generated": generated_recipes.generated_store.stats(),
+        "resilience": resilience.stats(),
+        "mongo_pool": database.pool_stats.stats()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Metriken im Prometheus-Textformat: Latenz pro Route, MongoDB-Befehle,
+    LLM-Aufrufe (Dauer, Tokens, Fehler pro Funktion) sowie die Werte aus /stats.
+    """
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/search")
 async def search_recipes(
@@ -338,100 +559,106 @@ async def search_recipes(
     category: Optional[str] = None,
     area: Optional[str] = None,
     sort_by: Optional[str] = None,
-    sort_dir: Optional[str] = "asc"
+    sort_dir: Optional[str] = "asc",
+    mode: Optional[str] = None,
+    max_total: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern=recipe_documents.VIEW_PATTERN),
+    max_minutes: Optional[int] = Query(None, ge=0)
 ):
     """
     Durchsucht Rezepte nach einem Suchbegriff mit gleichzeitiger Filterung und Sortierung.
     
+    Gesamtanzahl und Ergebnisseite werden in einer einzigen Aggregation ($facet) ermittelt.
+    
     - q: Der Suchbegriff
     - category: Nach Kategorie filtern
     - area: Nach Herkunftsregion filtern
     - sort_by: Sortierfeld (title, cookingTime, servings)
     - sort_dir: Sortierrichtung (asc, desc)
+    - mode: Suchmodus (regex, text, memory), Standard aus SEARCH_MODE
+    - max_total: Zählt höchstens so viele Treffer (Standard aus SEARCH_MAX_TOTAL);
+      "total_capped" gibt an, ob die Gesamtanzahl abgeschnitten wurde
+    - cursor: "next_cursor" der vorherigen Antwort (ersetzt skip)
+    - view: "full" (vollständige Rezepte) oder "summary" (nur Kartenfelder)
+    - max_minutes: Nur Rezepte mit höchstens so vielen Minuten Kochzeit
     """
-    # Grundabfrage mit Suchbegriff
-    query = {
-        "$or": [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"tags": {"$regex": q, "$options": "i"}},
-            {"ingredients.name": {"$regex": q, "$options": "i"}},
-            {"category": {"$regex": q, "$options": "i"}},
-            {"area": {"$regex": q, "$options": "i"}}
-        ]
-    }
+    search_mode = search_module.resolve_mode(mode)
+    max_total = max_total or search_module.SEARCH_MAX_TOTAL or None
     
     # Füge weitere Filter hinzu, wenn angegeben
+    filters = {}
     if category:
-        query["category"] = {"$regex": category, "$options": "i"}
+        filters["category"] = search_module.contains(category)
     
     if area:
-        query["area"] = {"$regex": area, "$options": "i"}
+        filters["area"] = search_module.contains(area)
     
-    total = await app.mongodb["recipes"].count_documents(query)
+    if max_minutes is not None:
+        filters["cookingMinutes"] = {"$lte": max_minutes}
     
-    # Entscheide, ob wir nach Relevanz oder einem anderen Feld sortieren
-    if not sort_by:
-        # Aggregation-Pipeline für Relevanz
-        pipeline = [
-            {"$match": query},
+    # cookingTime/servings numerisch über cookingMinutes/servingsCount sortieren
+    if sort_by:
+        sort_by = recipe_documents.sort_field(sort_by)
+    
+    if search_mode == "memory":
+        # Suche komplett im In-Memory-Index beantworten
+        offset = pagination.decode_offset_cursor(cursor) if cursor else skip
+        total, recipes = search_engine.engine.query(
+            q, category, area, sort_by, sort_dir, offset, limit, max_minutes
+        )
+        next_page = pagination.offset_cursor(offset + len(recipes), total)
+    else:
+        # Grundabfrage mit Suchbegriff
+        query = search_module.search_filter(q, search_mode, filters)
+        
+        # Entscheide, ob wir nach Relevanz oder einem anderen Feld sortieren
+        if not sort_by:
             # Relevanz-Score berechnen basierend auf wo der Suchbegriff vorkommt
-            {"$addFields": {
-                "relevanceScore": {
-                    "$sum": [
-                        # Treffer im Titel haben höchste Priorität
-                        {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$title", ""]}, "regex": q, "options": "i"}}, 10, 0]},
-                        # Treffer in Kategorie haben zweithöchste Priorität
-                        {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$category", ""]}, "regex": q, "options": "i"}}, 8, 0]},
-                        # Treffer in Herkunftsregion
-                        {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$area", ""]}, "regex": q, "options": "i"}}, 7, 0]},
-                        # Treffer in Tags
-                        {"$cond": [{"$in": [q, {"$ifNull": ["$tags", []]}]}, 5, 0]},
-                        # Zählen wie viele Zutaten übereinstimmen (weniger wichtig)
-                        {"$size": {"$filter": {
-                            "input": {"$ifNull": ["$ingredients", []]},
-                            "as": "ingredient",
-                            "cond": {"$regexMatch": {"input": "$$ingredient.name", "regex": q, "options": "i"}}
-                        }}}
-                    ]
-                }
-            }},
-            {"$sort": {"relevanceScore": -1, "title": 1}},
-            {"$skip": skip},
-            {"$limit": limit}
-        ]
+            pre_stages = [search_module.relevance_stage(q, search_mode)]
+            spec = pagination.sort_spec(("relevanceScore", -1), ("title", 1))
+        else:
+            # Explizite Sortierung: 1 für aufsteigend, -1 für absteigend
+            pre_stages = []
+            sort_direction = 1 if sort_dir.lower() == "asc" else -1
+            spec = pagination.sort_spec((sort_by, sort_direction))
         
-        # Aggregations-Pipeline für relevanzbasierte Suche verwenden
-        recipes = await app.mongodb["recipes"].aggregate(pipeline).to_list(limit)
-    else:
-        # Fall back auf normale Suche mit expliziter Sortierung 
-        # Sortieroption vorbereiten
-        sort_options = {}
-        # 1 für aufsteigend, -1 für absteigend
-        sort_direction = 1 if sort_dir.lower() == "asc" else -1
-        sort_options = {sort_by: sort_direction}
+        page_stages = pagination.page_stages(spec, cursor, skip, limit)
+        projection = recipe_documents.projection_for(view, *(field for field, _ in spec))
+        if projection:
+            page_stages.append({"$project": projection})
         
-        # Finde Rezepte mit Sortierung
-        # Finde Rezepte mit Sortierung
-        cursor = app.mongodb["recipes"].find(query)
-        cursor = cursor.sort(list(sort_options.items()))
-        recipes = await cursor.skip(skip).limit(limit).to_list(limit)
+        pipeline = search_module.facet_pipeline(
+            query,
+            page_stages,
+            # Ein Treffer mehr, um "genau max_total" von "abgeschnitten" zu unterscheiden
+            max_total=max_total + 1 if max_total else None,
+            pre_stages=pre_stages
+        )
+        result = await app.mongodb_read["recipes"].aggregate(pipeline).to_list(1)
+        total, recipes = search_module.unpack_facet(result)
+        next_page = pagination.next_cursor(recipes, spec, limit)
+    
+    total_capped = bool(max_total) and total > max_total
+    if total_capped:
+        total = max_total
     
     # Konvertiere ObjectId zu String und stelle sicher, dass cookingTime und servings Strings sind
     for recipe in recipes:
-        recipe["_id"] = str(recipe["_id"])
-        
-        # Konvertiere cookingTime zu String, falls es eine Zahl ist
-        if "cookingTime" in recipe and not isinstance(recipe["cookingTime"], str):
-            recipe["cookingTime"] = f"{recipe['cookingTime']} Min"
-            
-        # Konvertiere servings zu String, falls es eine Zahl ist
-        if "servings" in recipe and not isinstance(recipe["servings"], str):
-            recipe["servings"] = f"{recipe['servings']} servings"
+        recipe_documents.prepare_for_response(recipe)
     
-    return {
+    if view == "summary":
+        recipes = [recipe_documents.to_summary(recipe) for recipe in recipes]
+    
+    result = {
         "total": total,
+        "total_capped": total_capped,
+        "next_cursor": next_page,
         "recipes": recipes
     }
+    if fast_json.FAST_JSON_ENABLED:
+        return fast_json.FastJSONResponse(result)
+    return result
 
 
 @app.post("/detect-ingredients", response_model=IngredientsResponse)
@@ -454,7 +681,7 @@ async def detect_ingredients(upload: ImageUpload):
     try:
         
         # Analysiere die Bilder mit Azure OpenAI über den LLM-Service
-        ingredients_response = llm_service.analyze_images(upload.images)
+        ingredients_response = await llm_service.analyze_images(upload.images)
         return ingredients_response
         
     except Exception as e:
@@ -0,0 +1,214 @@
+import re
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+NAMESPACE = "mealmate"
+
+# Latenz-Buckets (Sekunden): HTTP/MongoDB im Millisekundenbereich, LLM im Sekundenbereich
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    namespace=NAMESPACE,
+    buckets=REQUEST_BUCKETS,
+)
+
+http_response_start = Histogram(
+    "http_response_start_seconds",
+    "Time until the response headers are sent, by route template",
+    ["method", "route", "status"],
+    namespace=NAMESPACE,
+    buckets=REQUEST_BUCKETS,
+)
+
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency as seen by the driver",
+    ["command", "status"],
+    namespace=NAMESPACE,
+    buckets=REQUEST_BUCKETS,
+)
+
+llm_call_duration = Histogram(
+    "llm_call_duration_seconds",
+    "LLM call latency (without limiter queue wait) by function",
+    ["function", "status"],
+    namespace=NAMESPACE,
+    buckets=LLM_BUCKETS,
+)
+
+llm_calls = Counter(
+    "llm_calls",
+    "Finished LLM calls by function and outcome (ok, timeout, error)",
+    ["function", "status"],
+    namespace=NAMESPACE,
+)
+
+llm_tokens = Counter(
+    "llm_tokens",
+    "LLM tokens by function and type (input, output)",
+    ["function", "type"],
+    namespace=NAMESPACE,
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    http_request_duration.labels(method, route, str(status)).observe(seconds)
+
+
+class RequestLatencyMiddleware:
+    """
+    Plain ASGI middleware recording HTTP latency per route template (e.g.
+    /recipes/{recipe_id}): the time until the response headers are sent and
+    until the final body chunk (for SSE streams the whole stream).
+
+    Unlike `@app.middleware("http")` it does not wrap the response in a
+    second task and stream, so streaming responses are passed through as is.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = 500
+
+        def route() -> str:
+            # Wird vom Router in den (gemeinsamen) Scope geschrieben
+            matched = scope.get("route")
+            return matched.path if matched is not None else "unmatched"
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                http_response_start.labels(scope["method"], route(), str(status)).observe(
+                    time.perf_counter() - started_at
+                )
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe_request(scope["method"], route(), status, time.perf_counter() - started_at)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        except Exception:
+            # Unbehandelte Fehler zählen mit Status 500
+            observe_request(scope["method"], route(), status, time.perf_counter() - started_at)
+            raise
+
+
+def observe_llm_call(function: str, status: str, seconds: float) -> None:
+    llm_call_duration.labels(function, status).observe(seconds)
+    llm_calls.labels(function, status).inc()
+
+
+def count_llm_tokens(function: str, usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Counts the tokens of a LangChain `usage_metadata` dict (may be None).
+    """
+    if not usage:
+        return
+    for kind in ("input", "output"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            llm_tokens.labels(function, kind).inc(tokens)
+
+
+class CommandTimer(monitoring.CommandListener):
+    """
+    Records the duration of every MongoDB command (find, aggregate, ...).
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongo_command_duration.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+command_timer = CommandTimer()
+
+
+class StatsCollector:
+    """
+    Exposes the numeric values of the registered `stats()` sources (the
+    sections of /stats) as gauges, e.g. `mealmate_cache_hit_ratio`.
+
+    Nested dicts become labels: with `labels={"hits": "tier"}` the entry
+    `{"hits": {"memory": 3}}` is exported as `..._hits{tier="memory"} 3`.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, Tuple[Callable[[], Dict[str, Any]], Dict[str, str]]] = {}
+
+    def register(self, name: str, stats: Callable[[], Dict[str, Any]],
+                 labels: Optional[Dict[str, str]] = None) -> None:
+        self.sources[name] = (stats, labels or {})
+
+    def _flatten(self, prefix: str, stats: Dict[str, Any], label_names: Dict[str, str],
+                 labels: Dict[str, str]) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                yield f"{prefix}_{key}", labels, value
+            elif isinstance(value, dict) and key in label_names:
+                for label, nested in value.items():
+                    nested_labels = {**labels, label_names[key]: str(label)}
+                    if isinstance(nested, dict):
+                        yield from self._flatten(prefix, nested, label_names, nested_labels)
+                    elif isinstance(nested, (int, float)):
+                        yield f"{prefix}_{key}", nested_labels, nested
+
+    def collect(self):
+        for name, (stats, label_names) in self.sources.items():
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Warning: could not collect {name} stats: {e}")
+                continue
+            families: Dict[str, list] = defaultdict(list)
+            for metric, labels, value in self._flatten(f"{NAMESPACE}_{name}", values, label_names, {}):
+                families[_metric_name(metric)].append((labels, value))
+            for metric, samples in families.items():
+                label_keys = sorted({key for labels, _ in samples for key in labels})
+                family = GaugeMetricFamily(metric, f"{name} stats", labels=label_keys)
+                for labels, value in samples:
+                    family.add_metric([labels.get(key, "") for key in label_keys], value)
+                yield family
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def register_stats(name: str, stats: Callable[[], Dict[str, Any]],
+                   labels: Optional[Dict[str, str]] = None) -> None:
+    stats_collector.register(name, stats, labels)
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Returns the Prometheus text exposition of all metrics and its content type.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
@@ -0,0 +1,62 @@
+"""
+Einmalige Migration der Rezept-Collection auf das aktuelle Dokumentformat.
+
+Speichert zu cookingTime/servings die numerischen Felder cookingMinutes und
+servingsCount (für Sortierung und Bereichsfilter) und wandelt numerische
+Werte in Anzeige-Strings um. Bereits migrierte Dokumente werden übersprungen,
+das Skript kann also beliebig oft ausgeführt werden.
+
+    python migrate_recipes.py [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+import database
+import indexes
+import recipe_documents
+
+
+async def migrate(batch_size: int, dry_run: bool) -> None:
+    client = database.create_client(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    collection = client[os.getenv("DB_NAME", "mealmate")]["recipes"]
+
+    pending = {"schemaVersion": {"$not": {"$gte": recipe_documents.SCHEMA_VERSION}}}
+    projection = {"cookingTime": 1, "servings": 1}
+    total = await collection.count_documents(pending)
+    print(f"{total} recipes to migrate")
+
+    migrated = 0
+    operations = []
+    async for doc in collection.find(pending, projection):
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": recipe_documents.normalized_fields(doc)}))
+        if len(operations) >= batch_size:
+            migrated += await _flush(collection, operations, dry_run)
+            operations = []
+            print(f"{migrated}/{total}")
+    if operations:
+        migrated += await _flush(collection, operations, dry_run)
+
+    if not dry_run:
+        await indexes.ensure_indexes(collection)
+    print(f"Done: {migrated} recipes {'would be ' if dry_run else ''}migrated")
+    client.close()
+
+
+async def _flush(collection, operations, dry_run: bool) -> int:
+    if dry_run:
+        return len(operations)
+    result = await collection.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Migriert Rezepte auf numerische Kochzeit/Portionen")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts schreiben")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.dry_run))
@@ -84,3 +84,27 @@ class Recipe(RecipeBase):
         allow_population_by_field_name = True
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
+
+class RecipeSummary(BaseModel):
+    """Kartenansicht eines Rezepts für Listen (ohne Zutaten und Anleitung)"""
+    id: str = Field(..., alias="_id")
+    title: str
+    image: Optional[HttpUrl] = None
+    category: Optional[str] = None
+    area: Optional[str] = None
+    cookingTime: Optional[str] = None
+    servings: Optional[str] = None
+
+    class Config:
+        allow_population_by_field_name = True
+
+class RecipeMatch(BaseModel):
+    """Gespeichertes Rezept, bewertet nach Abdeckung durch die vorhandenen Zutaten"""
+    id: str = Field(..., alias="_id")
+    title: str
+    coverage: float = Field(..., description="Anteil der Rezeptzutaten (ohne Vorrat), die vorhanden sind")
+    matched: List[str] = []
+    missing: List[str] = []
+
+    class Config:
+        allow_population_by_field_name = True
@@ -0,0 +1,125 @@
+import base64
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from fastapi import HTTPException
+
+# Sortierschlüssel: Liste von (Feld, Richtung), immer mit _id als letztem Schlüssel
+# (in der Richtung des ersten Schlüssels)
+SortSpec = List[Tuple[str, int]]
+
+
+def sort_spec(*fields: Tuple[str, int]) -> SortSpec:
+    """
+    Builds a sort specification with `_id` as final tie-breaker, so every
+    document has a unique position and cursors are stable.
+
+    `_id` follows the direction of the first key, so (field, -1) sorts can
+    walk a (field, 1), (_id, 1) index backwards instead of sorting in memory.
+    """
+    spec = list(fields)
+    if not any(field == "_id" for field, _ in spec):
+        spec.append(("_id", spec[0][1] if spec else 1))
+    return spec
+
+
+def encode_cursor(spec: SortSpec, values: Sequence[Any]) -> str:
+    """
+    Encodes the sort key of the last returned document as an opaque token.
+    """
+    payload = json_util.dumps({"k": [list(item) for item in spec], "v": list(values)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, spec: SortSpec) -> List[Any]:
+    """
+    Decodes a cursor token and checks that it belongs to the same sort order.
+
+    Raises:
+        HTTPException: 400 if the token is malformed or was issued for a different sort
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        keys = [tuple(item) for item in payload["k"]]
+        values = payload["v"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+    if keys != [tuple(item) for item in spec] or len(values) != len(spec):
+        raise HTTPException(status_code=400, detail="Cursor passt nicht zur Sortierung")
+    return values
+
+
+def _after(direction: int, value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Condition for "comes after `value`" in the given direction. Missing/null
+    values sort first in ascending and last in descending order.
+    """
+    if direction == 1:
+        return {"$gt": value} if value is not None else {"$ne": None}
+    if value is None:
+        return None
+    # Nicht `$lt`: das trifft keine fehlenden/null-Werte, die absteigend danach kommen
+    return {"$not": {"$gte": value}}
+
+
+def keyset_filter(spec: SortSpec, values: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Filter matching all documents that sort after the given key.
+
+    For keys (a, b, _id) this is `a > va OR (a == va AND b > vb) OR
+    (a == va AND b == vb AND _id > vid)`, which an index on the sort fields
+    can answer without walking the skipped documents.
+    """
+    branches = []
+    for position, (field, direction) in enumerate(spec):
+        condition = _after(direction, values[position])
+        if condition is None:
+            continue
+        branch = {spec[i][0]: values[i] for i in range(position)}
+        branch[field] = condition
+        branches.append(branch)
+    if not branches:
+        # Nichts kommt nach diesem Schlüssel
+        return {"_id": {"$exists": False}}
+    return {"$or": branches}
+
+
+def page_stages(spec: SortSpec, cursor: Optional[str], skip: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Aggregation stages for one page: keyset `$match` (if a cursor is given,
+    `skip` is then ignored), `$sort`, `$skip` and `$limit`.
+    """
+    stages: List[Dict[str, Any]] = []
+    if cursor:
+        stages.append({"$match": keyset_filter(spec, decode_cursor(cursor, spec))})
+    stages.append({"$sort": dict(spec)})
+    if skip and not cursor:
+        stages.append({"$skip": skip})
+    stages.append({"$limit": limit})
+    return stages
+
+
+def next_cursor(docs: List[Dict[str, Any]], spec: SortSpec, limit: int) -> Optional[str]:
+    """
+    Returns the cursor for the next page, or None if this was the last page.
+
+    Must be called before `_id` is converted to a string.
+    """
+    if not docs or len(docs) < limit:
+        return None
+    last = docs[-1]
+    return encode_cursor(spec, [last.get(field) for field, _ in spec])
+
+
+def offset_cursor(offset: int, total: int) -> Optional[str]:
+    """
+    Cursor for results that are paged in memory (plain offset).
+    """
+    if offset >= total:
+        return None
+    return encode_cursor([("offset", 1)], [offset])
+
+
+def decode_offset_cursor(token: str) -> int:
+    return int(decode_cursor(token, [("offset", 1)])[0])
@@ -0,0 +1,138 @@
+import asyncio
+import copy
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import cache
+import generated_recipes
+import llm_service
+
+# Rezeptdetails zu generierten Titeln vorab im Hintergrund erzeugen
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+PREFETCH_MAX_TITLES = int(os.getenv("PREFETCH_MAX_TITLES", "5"))
+PREFETCH_TTL_SECONDS = int(os.getenv("PREFETCH_TTL_SECONDS", "600"))
+PREFETCH_MAX_ENTRIES = int(os.getenv("PREFETCH_MAX_ENTRIES", "500"))
+# LLM-Slots, die immer für Anfragen von Nutzern frei bleiben
+PREFETCH_RESERVED_SLOTS = int(os.getenv("PREFETCH_RESERVED_SLOTS", "2"))
+
+
+class DetailPrefetcher:
+    """
+    Generates recipe details for freshly suggested titles in the background,
+    so the following /recipes/generate/details request is a cache hit.
+
+    Prefetching has low priority: at most PREFETCH_CONCURRENCY calls run at
+    once, and a prefetch is dropped if user requests are waiting for the LLM
+    limiter or fewer than PREFETCH_RESERVED_SLOTS slots are free. Results
+    are kept for PREFETCH_TTL_SECONDS. A request arriving while its prefetch
+    is already calling the LLM waits for it; a prefetch still queued behind
+    the others is dropped and the request calls the LLM itself.
+    """
+
+    def __init__(self, enabled: bool = PREFETCH_ENABLED):
+        self.enabled = enabled
+        self.results = cache.MemoryCache(PREFETCH_MAX_ENTRIES, PREFETCH_TTL_SECONDS)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Schlüssel der Prefetches, die ihren LLM-Aufruf bereits gestartet haben
+        self._started: Set[str] = set()
+        self._semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        self.scheduled = 0
+        self.prefetched = 0
+        self.skipped_busy = 0
+        self.errors = 0
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+        self.dropped = 0
+
+    def _busy(self) -> bool:
+        limiter = llm_service.limiter
+        return limiter.waiting > 0 or limiter.in_flight >= limiter.max_concurrency - PREFETCH_RESERVED_SLOTS
+
+    def schedule(self, titles: List[str], ingredients: List[str]) -> None:
+        """
+        Starts background prefetches for the first PREFETCH_MAX_TITLES titles.
+        """
+        if not self.enabled:
+            return
+        for title in titles[:PREFETCH_MAX_TITLES]:
+            key = cache.recipe_details_key(title, ingredients)
+            if key in self._tasks:
+                continue
+            task = asyncio.create_task(self._prefetch(key, title, list(ingredients)))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _, key=key: self._tasks.pop(key, None))
+            self.scheduled += 1
+
+    async def _prefetch(self, key: str, title: str, ingredients: List[str]) -> Optional[Dict[str, Any]]:
+        async with self._semaphore:
+            if self._busy():
+                self.skipped_busy += 1
+                return None
+            self._started.add(key)
+            try:
+                details = await generated_recipes.generate_details(title, ingredients)
+            except Exception as e:
+                print(f"Warning: prefetch of '{title}' failed: {e}")
+                details = None
+            finally:
+                self._started.discard(key)
+        # Ersatzantworten (LLM nicht erreichbar) nicht für später aufheben
+        if not details or "error" in details or details.get("fallback"):
+            self.errors += 1
+            return None
+        self.prefetched += 1
+        await self.results.set(key, details)
+        return details
+
+    async def take(self, title: str, ingredients: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Returns prefetched details (waiting for a running prefetch), or None.
+        """
+        if not self.enabled:
+            return None
+        key = cache.recipe_details_key(title, ingredients)
+        task = self._tasks.get(key)
+        if task is not None:
+            if key not in self._started:
+                # Noch in der Warteschlange: nicht auf die anderen Prefetches warten
+                task.cancel()
+                self.dropped += 1
+                self.misses += 1
+                return None
+            details = await asyncio.shield(task)
+            if details is not None:
+                self.joined += 1
+                await self.results.delete(key)
+                return copy.deepcopy(details)
+        details = await self.results.get(key)
+        if details is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        await self.results.delete(key)
+        return details
+
+    def stats(self) -> Dict[str, Any]:
+        used = self.hits + self.joined
+        # Vorab erzeugt, aber weder abgerufen noch noch im Cache
+        wasted = max(0, self.prefetched - used - len(self.results))
+        return {
+            "enabled": self.enabled,
+            "scheduled": self.scheduled,
+            "running": len(self._tasks),
+            "prefetched": self.prefetched,
+            "skipped_busy": self.skipped_busy,
+            "errors": self.errors,
+            "hits": self.hits,
+            "joined": self.joined,
+            "misses": self.misses,
+            "dropped": self.dropped,
+            "wasted": wasted,
+            "hit_rate": used / (used + self.misses) if used + self.misses else 0.0,
+            "waste_rate": wasted / self.prefetched if self.prefetched else 0.0,
+        }
+
+
+detail_prefetcher = DetailPrefetcher()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+# Zufallsauswahl: "pool" (ID-Pool im Speicher) oder "sample" (MongoDB $sample)
+RANDOM_STRATEGY = os.getenv("RANDOM_STRATEGY", "pool").lower()
+RANDOM_POOL_REFRESH_SECONDS = int(os.getenv("RANDOM_POOL_REFRESH_SECONDS", "600"))
+# Höchstzahl zwischengespeicherter Pools für Kategorie-Teilstrings
+RANDOM_MAX_COMBINED_POOLS = 256
+
+
+class RandomPicker:
+    """
+    Picks random recipes from an in-memory pool of ids per category.
+
+    The pool is (re)loaded with a single id/category projection scan every
+    RANDOM_POOL_REFRESH_SECONDS; the flattened pool of all recipes is built
+    during the refresh, the pool for a category filter on first use, so a
+    pick only costs `random.sample` plus an `_id $in` lookup of `limit`
+    documents. A stale pool is reloaded in the background while picks keep
+    using the old one. With a seed the pick is deterministic (e.g. "recipe
+    of the day").
+    """
+
+    def __init__(self, refresh_seconds: int = RANDOM_POOL_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.collection = None
+        self._pools: Dict[str, List[Any]] = {}
+        self._all: List[Any] = []
+        # Zusammengefasste Pools pro Kategorie-Filter, gültig bis zum nächsten Laden
+        self._combined: Dict[str, List[Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.picks = 0
+        self.refreshes = 0
+
+    def attach(self, collection) -> None:
+        self.collection = collection
+        self._loaded_at = None
+        self._pools, self._all, self._combined = {}, [], {}
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def refresh(self) -> None:
+        pools: Dict[str, List[Any]] = {}
+        async for doc in self.collection.find({}, {"category": 1}):
+            key = str(doc.get("category") or "").casefold()
+            pools.setdefault(key, []).append(doc["_id"])
+        # Feste Reihenfolge, damit Seeds unabhängig von der Ladereihenfolge sind
+        for ids in pools.values():
+            ids.sort(key=str)
+        self._pools = pools
+        self._all = [doc_id for key in sorted(pools) for doc_id in pools[key]]
+        self._combined = {}
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+
+    async def _refresh_locked(self) -> None:
+        async with self._lock:
+            if self._stale():
+                await self.refresh()
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self._refresh_locked()
+        except Exception as e:
+            print(f"Warning: random pool refresh failed: {e}")
+
+    async def _ensure_fresh(self) -> None:
+        if not self._stale():
+            return
+        if self._loaded_at is None:
+            # Noch kein Pool: einmalig im Request laden
+            await self._refresh_locked()
+        elif self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    def _pool(self, category: Optional[str]) -> List[Any]:
+        if not category:
+            return self._all
+        # Teilstring ohne Beachtung der Groß-/Kleinschreibung wie beim bisherigen $regex
+        needle = category.casefold()
+        pool = self._combined.get(needle)
+        if pool is None:
+            keys = sorted(key for key in self._pools if needle in key)
+            pool = [doc_id for key in keys for doc_id in self._pools[key]]
+            if len(self._combined) < RANDOM_MAX_COMBINED_POOLS:
+                self._combined[needle] = pool
+        return pool
+
+    async def pick(self, limit: int, category: Optional[str] = None,
+                   seed: Optional[str] = None,
+                   projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` random recipes, optionally limited to a category
+        and reduced to the fields in `projection`.
+        """
+        await self._ensure_fresh()
+        self.picks += 1
+
+        pool = self._pool(category)
+        rng = random.Random(seed) if seed is not None else random
+        ids = rng.sample(pool, min(limit, len(pool)))
+        if not ids:
+            return []
+
+        docs = await self.collection.find({"_id": {"$in": ids}}, projection).to_list(len(ids))
+        # Reihenfolge der Auswahl beibehalten
+        by_id = {doc["_id"]: doc for doc in docs}
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": RANDOM_STRATEGY,
+            "categories": len(self._pools),
+            "recipes": len(self._all),
+            "combined_pools": len(self._combined),
+            "picks": self.picks,
+            "refreshes": self.refreshes,
+        }
+
+
+random_picker = RandomPicker()
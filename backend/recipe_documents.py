@@ -0,0 +1,164 @@
+import re
+from typing import Any, Dict, Optional
+
+# Felder, die Listenansichten (Karten, Highlights) benötigen
+SUMMARY_FIELDS = ("title", "image", "category", "area", "cookingTime", "servings")
+SUMMARY_PROJECTION = {field: 1 for field in SUMMARY_FIELDS}
+
+# Version des gespeicherten Dokumentformats (2 = numerische Minuten/Portionen,
+# 3 = Stunden und Minuten in cookingMinutes summiert, z.B. "1h30")
+SCHEMA_VERSION = 3
+
+# Sortierfelder, für die es einen numerischen (indizierbaren) Wert gibt
+NUMERIC_SORT_FIELDS = {
+    "cookingTime": "cookingMinutes",
+    "servings": "servingsCount",
+}
+
+# Antwortformate der Listen-Endpunkte
+VIEW_PATTERN = "^(full|summary)$"
+
+
+def projection_for(view: str, *extra_fields: str) -> Optional[Dict[str, int]]:
+    """
+    MongoDB projection for a list view (None loads the full document).
+
+    `extra_fields` are kept as well, e.g. the sort keys needed for cursors.
+    """
+    if view != "summary":
+        return None
+    projection = dict(SUMMARY_PROJECTION)
+    for field in extra_fields:
+        projection[field] = 1
+    return projection
+
+
+def sort_field(field: str) -> str:
+    """
+    Maps a requested sort field to the stored field it should sort on, so
+    "cookingTime" sorts numerically by `cookingMinutes`.
+    """
+    return NUMERIC_SORT_FIELDS.get(field, field)
+
+
+# Zahl (oder Bereich wie "30-40", gezählt wird die erste Zahl) mit folgender Einheit
+_DURATION_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)(?:\s*(?:-|–|bis|to)\s*\d+(?:[.,]\d+)?)?\s*([a-zäöüß]*)")
+
+
+def parse_minutes(value: Any) -> Optional[int]:
+    """
+    Parses a cooking time like 30, "30 Min", "1 hour 20 minutes", "1 hr 15
+    min", "1h30" or "1,5 h" into minutes. Hour and minute components are
+    summed; a number without unit after hours counts as minutes ("1h30"),
+    a number without any unit as minutes ("45").
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    hours = minutes = None
+    bare = []
+    for number, unit in _DURATION_PATTERN.findall(str(value).casefold()):
+        amount = float(number.replace(",", "."))
+        if unit.startswith(("h", "std", "stunde")):
+            hours = (hours or 0) + amount
+        elif unit.startswith("m"):
+            minutes = (minutes or 0) + amount
+        else:
+            bare.append(amount)
+    if hours is None and minutes is None:
+        return int(bare[0]) if bare else None
+    if minutes is None and bare:
+        minutes = bare[0]
+    return int(round((hours or 0) * 60 + (minutes or 0)))
+
+
+def parse_servings(value: Any) -> Optional[int]:
+    """
+    Parses servings like 4, "4 servings" or "2-4" (first number) into a number.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    number = re.search(r"\d+", str(value))
+    return int(number.group()) if number else None
+
+
+def normalized_fields(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fields to store so reads need no conversion: numeric `cookingMinutes` /
+    `servingsCount` for sorting and range filters next to the display
+    strings `cookingTime` / `servings`.
+    """
+    fields: Dict[str, Any] = {"schemaVersion": SCHEMA_VERSION}
+    
+    if recipe.get("cookingTime") is not None:
+        minutes = parse_minutes(recipe["cookingTime"])
+        fields["cookingMinutes"] = minutes
+        if not isinstance(recipe["cookingTime"], str):
+            fields["cookingTime"] = f"{minutes} Min"
+    
+    if recipe.get("servings") is not None:
+        count = parse_servings(recipe["servings"])
+        fields["servingsCount"] = count
+        if not isinstance(recipe["servings"], str):
+            fields["servings"] = f"{count} servings"
+    
+    return fields
+
+
+def normalize_for_storage(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalizes a recipe document in place before it is written to MongoDB.
+    Every write path should call this.
+    """
+    recipe.update(normalized_fields(recipe))
+    return recipe
+
+
+def prepare_for_response(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a recipe document from MongoDB in place into the shape of the
+    `Recipe` response model: `_id` as string, cookingTime/servings as display
+    strings. Documents written with `normalize_for_storage` (or migrated with
+    migrate_recipes.py) already have display strings; only `_id` changes.
+    """
+    recipe["_id"] = str(recipe["_id"])
+    
+    # Konvertiere cookingTime zu String, falls es eine Zahl ist
+    if "cookingTime" in recipe and not isinstance(recipe["cookingTime"], str):
+        recipe["cookingTime"] = f"{recipe['cookingTime']} Min"
+        
+    # Konvertiere servings zu String, falls es eine Zahl ist
+    if "servings" in recipe and not isinstance(recipe["servings"], str):
+        recipe["servings"] = f"{recipe['servings']} servings"
+    
+    return recipe
+
+
+def to_details(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a stored recipe document into the shape of the
+    /recipes/generate/details response.
+    """
+    details = {"title": recipe["title"]}
+    if recipe.get("cookingTime"):
+        details["cookTime"] = recipe["cookingTime"]
+    if recipe.get("servingsCount") is not None:
+        details["servings"] = str(recipe["servingsCount"])
+    details["ingredients"] = recipe.get("ingredients") or []
+    details["instructions"] = recipe.get("instructions") or []
+    details["recipeId"] = str(recipe["_id"])
+    return details
+
+
+def to_summary(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduces a prepared recipe document to the card fields.
+    """
+    summary = {"_id": recipe["_id"]}
+    for field in SUMMARY_FIELDS:
+        if field in recipe:
+            summary[field] = recipe[field]
+    return summary
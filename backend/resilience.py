@@ -0,0 +1,286 @@
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import openai
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, stop_before_delay, wait_random_exponential
+
+# Gesamtbudget pro Operation (Sekunden) inkl. Warteschlange, Wiederholungen und Pausen
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))
+OPERATION_DEADLINES = {
+    "generate_recipes": float(os.getenv("LLM_DEADLINE_GENERATE_RECIPES", "20")),
+    "generate_recipe_details": float(os.getenv("LLM_DEADLINE_GENERATE_RECIPE_DETAILS", "45")),
+    "stream_recipe_details": float(os.getenv("LLM_DEADLINE_STREAM_RECIPE_DETAILS", "90")),
+    "analyze_images": float(os.getenv("LLM_DEADLINE_ANALYZE_IMAGES", "30")),
+}
+
+# Wiederholungen bei vorübergehenden Fehlern (Timeout, Verbindung, 429, 5xx)
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "4"))
+
+# Circuit Breaker: nach so vielen Fehlern in Folge werden LLM-Aufrufe sofort
+# abgelehnt; nach LLM_BREAKER_RESET_SECONDS darf ein Testaufruf durch
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# HTTP-Status, bei denen eine Wiederholung sinnvoll ist
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 429})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an operation's deadline passes before the LLM could answer."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed LLM call is worth retrying (and counts for the breaker).
+    """
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                          openai.InternalServerError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in TRANSIENT_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def deadline_for(operation: str) -> float:
+    return OPERATION_DEADLINES.get(operation, LLM_DEADLINE_SECONDS)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls pass, transient failures are counted. After
+    `failure_threshold` failures in a row the breaker opens and rejects
+    calls with CircuitOpenError. After `reset_seconds` it is half-open and
+    lets a single trial call through, which closes it again on success or
+    reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        """
+        Raises CircuitOpenError if the call must not reach the LLM.
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.rejected += 1
+                raise CircuitOpenError("LLM temporarily unavailable (circuit breaker open)")
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_running:
+                self.rejected += 1
+                raise CircuitOpenError("LLM temporarily unavailable (circuit breaker half-open)")
+            self._trial_running = True
+
+    def release(self) -> None:
+        """Ends a trial call that neither succeeded nor failed (cancelled)."""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self._trial_running = False
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = None
+
+    def record_failure(self, error: BaseException) -> None:
+        self._trial_running = False
+        if isinstance(error, DeadlineExceeded):
+            # Budget schon in der Warteschlange aufgebraucht, das LLM wurde nicht gefragt
+            return
+        if not is_transient(error):
+            # Das LLM hat geantwortet (z.B. 400), der Dienst selbst ist erreichbar:
+            # unterbricht die Fehlerserie wie ein erfolgreicher Aufruf
+            self.record_success()
+            return
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "state_code": _STATE_CODES[self.state],
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class ResiliencePolicy:
+    """
+    Wraps LLM calls with a deadline per operation, jittered exponential
+    retries on transient errors (tenacity) and a circuit breaker.
+
+    An attempt is a coroutine (or async iterator) factory receiving the
+    absolute deadline (event loop time). A retry is only started if it can
+    begin before the deadline; streams are only retried until their first
+    chunk has arrived.
+    """
+
+    def __init__(self, breaker: CircuitBreaker, attempts: int = LLM_RETRY_ATTEMPTS):
+        self.breaker = breaker
+        self.attempts = attempts
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+
+    def _retrying(self, operation: str) -> AsyncRetrying:
+        def count_retry(_) -> None:
+            self.retries += 1
+
+        return AsyncRetrying(
+            stop=stop_after_attempt(self.attempts) | stop_before_delay(deadline_for(operation)),
+            wait=wait_random_exponential(multiplier=LLM_RETRY_BASE_SECONDS, max=LLM_RETRY_MAX_SECONDS),
+            retry=retry_if_exception(is_transient),
+            before_sleep=count_retry,
+            reraise=True,
+        )
+
+    def _deadline(self, operation: str) -> float:
+        return asyncio.get_running_loop().time() + deadline_for(operation)
+
+    def _check_deadline(self, deadline: float) -> None:
+        if asyncio.get_running_loop().time() >= deadline:
+            self.deadline_exceeded += 1
+            raise DeadlineExceeded("LLM deadline exceeded")
+
+    async def call(self, operation: str, attempt: Callable[[float], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        deadline = self._deadline(operation)
+        try:
+            async for retry in self._retrying(operation):
+                with retry:
+                    self._check_deadline(deadline)
+                    self.breaker.before_call()
+                    try:
+                        result = await attempt(deadline)
+                    except Exception as e:
+                        self.breaker.record_failure(e)
+                        raise
+                    except BaseException:
+                        self.breaker.release()
+                        raise
+                    self.breaker.record_success()
+                    return result
+        except Exception:
+            self.failures += 1
+            raise
+
+    async def stream(self, operation: str, attempt: Callable[[float], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        self.calls += 1
+        deadline = self._deadline(operation)
+        try:
+            async for retry in self._retrying(operation):
+                with retry:
+                    self._check_deadline(deadline)
+                    self.breaker.before_call()
+                    iterator = attempt(deadline).__aiter__()
+                    try:
+                        first = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        self.breaker.record_success()
+                        return
+                    except Exception as e:
+                        self.breaker.record_failure(e)
+                        raise
+                    except BaseException:
+                        self.breaker.release()
+                        raise
+        except Exception:
+            self.failures += 1
+            raise
+
+        # Ab dem ersten Chunk keine Wiederholung mehr (der Client hat bereits Daten)
+        try:
+            yield first
+            async for chunk in iterator:
+                yield chunk
+        except Exception as e:
+            self.failures += 1
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            # Client hat den Stream abgebrochen
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "deadline_exceeded": self.deadline_exceeded,
+        }
+
+
+class Fallbacks:
+    """
+    Fallback providers per operation, used when the LLM call fails or the
+    breaker is open (e.g. recipes matched from the database).
+
+    Providers are registered at startup to keep llm_service free of
+    database imports; they return None if they have nothing to offer.
+    """
+
+    def __init__(self):
+        self.providers: Dict[str, List[Callable[..., Awaitable[Optional[Any]]]]] = {}
+        self.served: Dict[str, int] = {}
+        self.missed: Dict[str, int] = {}
+
+    def register(self, operation: str, provider: Callable[..., Awaitable[Optional[Any]]]) -> None:
+        self.providers.setdefault(operation, []).append(provider)
+
+    async def get(self, operation: str, *args: Any) -> Optional[Any]:
+        for provider in self.providers.get(operation, []):
+            try:
+                result = await provider(*args)
+            except Exception as e:
+                print(f"Warning: fallback for {operation} failed: {e}")
+                continue
+            if result:
+                self.served[operation] = self.served.get(operation, 0) + 1
+                return result
+        self.missed[operation] = self.missed.get(operation, 0) + 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"fallbacks_served": dict(self.served), "fallbacks_missed": dict(self.missed)}
+
+
+llm_breaker = CircuitBreaker()
+llm_policy = ResiliencePolicy(llm_breaker)
+fallbacks = Fallbacks()
+
+
+def stats() -> Dict[str, Any]:
+    """Flat section for /stats and /metrics (fallback counters per operation)."""
+    breaker = {f"breaker_{key}": value for key, value in llm_breaker.stats().items()}
+    return {**llm_policy.stats(), **breaker, **fallbacks.stats()}
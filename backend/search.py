@@ -0,0 +1,158 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+import search_engine
+
+# Suchmodus: "regex" (Teilstring-Suche), "text" (MongoDB-Textindex) oder
+# "memory" (In-Memory-Index, siehe search_engine)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "regex").lower()
+SEARCH_MODES = ("regex", "text", "memory")
+TEXT_SEARCH_LANGUAGE = os.getenv("TEXT_SEARCH_LANGUAGE", "english")
+# Obergrenze für das Zählen der Treffer in /search (0 = exakt zählen)
+SEARCH_MAX_TOTAL = int(os.getenv("SEARCH_MAX_TOTAL", "0"))
+
+TEXT_INDEX_NAME = "recipe_text_search"
+# Gewichte entsprechen dem Relevanz-Score der Regex-Suche
+TEXT_INDEX_WEIGHTS = {
+    "title": 10,
+    "category": 8,
+    "area": 7,
+    "tags": 5,
+    "ingredients.name": 1,
+}
+
+
+def resolve_mode(mode: Optional[str]) -> str:
+    """
+    Returns the search mode for a request (falls back to SEARCH_MODE).
+
+    The "memory" mode falls back to "regex" while the in-memory index is
+    not loaded.
+    """
+    mode = (mode or SEARCH_MODE).lower()
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unbekannter Suchmodus: {mode}")
+    if mode == "memory" and not search_engine.engine.ready:
+        return "regex"
+    return mode
+
+
+def contains(term: str) -> Dict[str, Any]:
+    """
+    Case-insensitive substring match. The term is escaped, so user input can
+    never be interpreted as a (potentially catastrophic) regular expression.
+    """
+    return {"$regex": re.escape(term), "$options": "i"}
+
+
+def regex_search_filter(term: str) -> Dict[str, Any]:
+    """
+    Filter for the regex mode: the term occurs in title, tags, category, area
+    or an ingredient name.
+    """
+    return {
+        "$or": [
+            {"title": contains(term)},
+            {"tags": contains(term)},
+            {"category": contains(term)},
+            {"area": contains(term)},
+            {"ingredients.name": contains(term)}
+        ]
+    }
+
+
+def text_search_filter(term: str) -> Dict[str, Any]:
+    """
+    Filter for the text mode, answered by the text index.
+    """
+    return {"$text": {"$search": term}}
+
+
+def search_filter(term: str, mode: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Combines the search filter for `mode` with additional field filters.
+    """
+    filters = filters or {}
+    if mode == "text":
+        # $text muss auf oberster Ebene des $match stehen
+        return {**filters, **text_search_filter(term)}
+    if filters:
+        return {"$and": [filters, regex_search_filter(term)]}
+    return regex_search_filter(term)
+
+
+def relevance_stage(term: str, mode: str) -> Dict[str, Any]:
+    """
+    `$addFields` stage computing `relevanceScore` for the given mode.
+    """
+    if mode == "text":
+        return {"$addFields": {"relevanceScore": {"$meta": "textScore"}}}
+
+    pattern = re.escape(term)
+    return {"$addFields": {
+        "relevanceScore": {
+            "$sum": [
+                # Treffer im Titel haben höchste Priorität
+                {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$title", ""]}, "regex": pattern, "options": "i"}}, 10, 0]},
+                # Treffer in Kategorie haben zweithöchste Priorität
+                {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$category", ""]}, "regex": pattern, "options": "i"}}, 8, 0]},
+                # Treffer in Herkunftsregion
+                {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$area", ""]}, "regex": pattern, "options": "i"}}, 7, 0]},
+                # Treffer in Tags
+                {"$cond": [{"$anyElementTrue": {
+                    "$map": {
+                        "input": {"$ifNull": ["$tags", []]},
+                        "as": "tag",
+                        "in": {"$regexMatch": {"input": "$$tag", "regex": pattern, "options": "i"}}
+                    }
+                }}, 5, 0]},
+                # Zählen wie viele Zutaten übereinstimmen (weniger wichtig)
+                {"$size": {"$filter": {
+                    "input": {"$ifNull": ["$ingredients", []]},
+                    "as": "ingredient",
+                    "cond": {"$regexMatch": {"input": "$$ingredient.name", "regex": pattern, "options": "i"}}
+                }}}
+            ]
+        }
+    }}
+
+
+def facet_pipeline(query: Dict[str, Any], page_stages: List[Dict[str, Any]],
+                   max_total: Optional[int] = None,
+                   pre_stages: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Builds a pipeline that returns the total and one page in a single pass.
+
+    The result is one document `{"total": [{"count": n}], "recipes": [...]}`.
+    With `max_total` the count stops after that many matches, which keeps
+    very broad queries cheap.
+
+    Args:
+        query: `$match` filter
+        page_stages: Stages producing the page (sort, skip, limit)
+        max_total: Optional cap for the count
+        pre_stages: Stages to run on all matches before the facet (e.g. relevance)
+    """
+    count_stages: List[Dict[str, Any]] = []
+    if max_total:
+        count_stages.append({"$limit": max_total})
+    count_stages.append({"$count": "count"})
+    return [
+        {"$match": query},
+        *(pre_stages or []),
+        {"$facet": {"total": count_stages, "recipes": page_stages}},
+    ]
+
+
+def unpack_facet(result: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Extracts total and page from the output of `facet_pipeline`.
+    """
+    if not result:
+        return 0, []
+    counts = result[0].get("total") or []
+    total = counts[0]["count"] if counts else 0
+    return total, result[0].get("recipes", [])
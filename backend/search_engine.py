@@ -0,0 +1,274 @@
+import asyncio
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# In-Memory-Suchindex für den Suchmodus "memory"
+SEARCH_ENGINE_ENABLED = os.getenv("SEARCH_ENGINE_ENABLED", "false").lower() == "true"
+SEARCH_ENGINE_REFRESH_SECONDS = int(os.getenv("SEARCH_ENGINE_REFRESH_SECONDS", "300"))
+
+# Felder mit festem Slot; Zutaten belegen ab INGREDIENT_SLOT je einen eigenen Slot
+FIELD_SLOTS = {"title": 0, "category": 1, "area": 2, "tags": 3}
+INGREDIENT_SLOT = 4
+# Gewichte wie beim Relevanz-Score der Regex-Suche (Zutaten zählen je 1)
+SLOT_WEIGHTS = {0: 10, 1: 8, 2: 7, 3: 5}
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: Any) -> List[str]:
+    return _TOKEN_PATTERN.findall(str(text).casefold())
+
+
+class RecipeIndex:
+    """
+    Inverted index over the searchable recipe fields.
+
+    Postings map a token to the documents containing it, together with the
+    slots (field, or individual ingredient) the token occurs in. A query term
+    matches a slot if every query token is a prefix of a token in that slot;
+    the score sums the field weights of all matching slots, mirroring the
+    `relevanceScore` of the regex search.
+    """
+
+    def __init__(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, Set[int]]] = defaultdict(dict)
+        self.doc_tokens: Dict[str, Set[str]] = {}
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        doc_id = str(doc["_id"])
+        if doc_id in self.docs:
+            self.remove(doc_id)
+
+        slots: Dict[str, Set[int]] = defaultdict(set)
+        for field, slot in FIELD_SLOTS.items():
+            value = doc.get(field)
+            values = value if isinstance(value, list) else [value]
+            for item in values:
+                if item:
+                    for token in tokenize(item):
+                        slots[token].add(slot)
+        for position, ingredient in enumerate(doc.get("ingredients") or []):
+            name = ingredient.get("name") if isinstance(ingredient, dict) else None
+            if name:
+                for token in tokenize(name):
+                    slots[token].add(INGREDIENT_SLOT + position)
+
+        for token, token_slots in slots.items():
+            if token not in self.postings:
+                self._vocabulary = None
+            self.postings[token][doc_id] = token_slots
+        self.doc_tokens[doc_id] = set(slots)
+        self.docs[doc_id] = doc
+
+    def remove(self, doc_id: str) -> None:
+        for token in self.doc_tokens.pop(doc_id, ()):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[token]
+                self._vocabulary = None
+        self.docs.pop(doc_id, None)
+
+    def _expand(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect_left(self._vocabulary, prefix)
+        matches = []
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.append(token)
+        return matches
+
+    def search(self, term: str) -> Dict[str, int]:
+        """
+        Returns the relevance score per matching document id.
+        """
+        query_tokens = tokenize(term)
+        if not query_tokens:
+            return {}
+
+        matched: Optional[Dict[str, Set[int]]] = None
+        for query_token in query_tokens:
+            token_slots: Dict[str, Set[int]] = defaultdict(set)
+            for token in self._expand(query_token):
+                for doc_id, slots in self.postings[token].items():
+                    if matched is None or doc_id in matched:
+                        token_slots[doc_id] |= slots
+            if matched is None:
+                matched = token_slots
+            else:
+                matched = {
+                    doc_id: matched[doc_id] & slots
+                    for doc_id, slots in token_slots.items()
+                    if matched[doc_id] & slots
+                }
+            if not matched:
+                return {}
+
+        return {
+            doc_id: sum(SLOT_WEIGHTS.get(slot, 1) for slot in slots)
+            for doc_id, slots in matched.items()
+        }
+
+
+def _contains(value: Any, needle: str) -> bool:
+    return value is not None and needle in str(value).casefold()
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # Zahlen vor allen anderen Werten und numerisch verglichen (wie in MongoDB)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return 0, value
+    return 1, str(value)
+
+
+class SearchEngine:
+    """
+    Keeps the recipes collection in memory and answers searches without
+    touching MongoDB.
+
+    Updates arrive through a change stream; if the deployment does not
+    support change streams (standalone server), the index is rebuilt every
+    SEARCH_ENGINE_REFRESH_SECONDS instead.
+    """
+
+    def __init__(self, refresh_seconds: int = SEARCH_ENGINE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.collection = None
+        self.index = RecipeIndex()
+        self.ready = False
+        self.loaded_at: Optional[float] = None
+        self.refresh_strategy: Optional[str] = None
+        self.queries = 0
+        self.updates = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, collection) -> None:
+        self.collection = collection
+        await self.reload()
+        self._task = asyncio.create_task(self._keep_fresh())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def reload(self) -> None:
+        """
+        Rebuilds the index from the collection and swaps it in.
+        """
+        index = RecipeIndex()
+        async for doc in self.collection.find({}):
+            index.add(doc)
+        self.index = index
+        self.loaded_at = time.time()
+        self.ready = True
+
+    async def _keep_fresh(self) -> None:
+        try:
+            self.refresh_strategy = "change_stream"
+            async with self.collection.watch(full_document="updateLookup") as stream:
+                async for change in stream:
+                    self._apply_change(change)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: change stream unavailable, polling every {self.refresh_seconds}s: {e}")
+
+        self.refresh_strategy = "poll"
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                print(f"Warning: search index refresh failed: {e}")
+
+    def _apply_change(self, change: Dict[str, Any]) -> None:
+        operation = change.get("operationType")
+        doc_id = str(change.get("documentKey", {}).get("_id"))
+        if operation == "delete":
+            self.index.remove(doc_id)
+        elif change.get("fullDocument") is not None:
+            self.index.add(change["fullDocument"])
+        elif operation in ("update", "replace"):
+            # Dokument wurde inzwischen gelöscht
+            self.index.remove(doc_id)
+        self.updates += 1
+
+    def query(
+        self,
+        term: str,
+        category: Optional[str] = None,
+        area: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_dir: str = "asc",
+        skip: int = 0,
+        limit: int = 10,
+        max_minutes: Optional[int] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Searches the index.
+
+        Returns:
+            Tuple[int, List[dict]]: Total number of matches and the requested
+            page (copies of the documents, with `relevanceScore` set)
+        """
+        self.queries += 1
+        scores = self.index.search(term)
+        category = category.casefold() if category else None
+        area = area.casefold() if area else None
+
+        results = []
+        for doc_id, score in scores.items():
+            doc = self.index.docs[doc_id]
+            if category and not _contains(doc.get("category"), category):
+                continue
+            if area and not _contains(doc.get("area"), area):
+                continue
+            if max_minutes is not None and not (
+                isinstance(doc.get("cookingMinutes"), int) and doc["cookingMinutes"] <= max_minutes
+            ):
+                continue
+            results.append((score, doc))
+
+        if sort_by:
+            present = [r for r in results if r[1].get(sort_by) is not None]
+            missing = [r for r in results if r[1].get(sort_by) is None]
+            present.sort(key=lambda r: _sort_key(r[1][sort_by]), reverse=sort_dir.lower() != "asc")
+            results = present + missing
+        else:
+            results.sort(key=lambda r: (-r[0], r[1].get("title") or ""))
+
+        page = [{**doc, "relevanceScore": score} for score, doc in results[skip:skip + limit]]
+        return len(results), page
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": SEARCH_ENGINE_ENABLED,
+            "ready": self.ready,
+            "documents": len(self.index),
+            "tokens": len(self.index.postings),
+            "refresh_strategy": self.refresh_strategy,
+            "loaded_at": self.loaded_at,
+            "queries": self.queries,
+            "updates": self.updates,
+        }
+
+
+engine = SearchEngine()
@@ -0,0 +1,49 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key starts `call()` as a task; callers arriving
+    while it runs await the same task and receive a copy of its result (or
+    its exception). The task is shielded, so a caller that disconnects does
+    not cancel the call for the others, and a finished call is forgotten
+    immediately - results are cached elsewhere.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(call())
+        self._calls[key] = task
+        self.calls += 1
+
+        def forget(finished: asyncio.Task) -> None:
+            if self._calls.get(key) is finished:
+                del self._calls[key]
+            # Fehler als abgerufen markieren, falls alle Aufrufer abgebrochen haben
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,139 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Eventnamen für die Listen eines Rezepts (ein Event pro Eintrag)
+LIST_EVENTS = {
+    "ingredients": "ingredient",
+    "instructions": "instruction",
+}
+
+
+def repair_partial_json(text: str) -> Optional[str]:
+    """
+    Turns the prefix of a JSON document into valid JSON.
+
+    The text is cut back to the last position where a value was complete
+    (unfinished strings, keys and literals are dropped) and the open objects
+    and arrays are closed. A leading markdown fence is skipped.
+
+    Returns:
+        The repaired JSON text, or None if no object/array has started yet
+    """
+    start = -1
+    for i, char in enumerate(text):
+        if char in "{[":
+            start = i
+            break
+    if start == -1:
+        return None
+
+    stack: List[str] = []
+    expect_key: List[bool] = []
+    safe_end = start
+    safe_closers = ""
+    in_string = False
+    escaped = False
+
+    def closers() -> str:
+        return "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if stack and stack[-1] == "{" and expect_key[-1]:
+                    # Schlüssel vollständig, der Wert fehlt noch
+                    expect_key[-1] = False
+                else:
+                    safe_end, safe_closers = i + 1, closers()
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+            expect_key.append(char == "{")
+            safe_end, safe_closers = i + 1, closers()
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+            expect_key.pop()
+            safe_end, safe_closers = i + 1, closers()
+            if not stack:
+                break
+        elif char == ",":
+            # Alles vor dem Komma ist ein vollständiger Wert
+            safe_end, safe_closers = i, closers()
+            if stack[-1] == "{":
+                expect_key[-1] = True
+
+    return text[start:safe_end] + safe_closers
+
+
+def parse_partial_json(text: str) -> Optional[Any]:
+    """
+    Parses an incomplete JSON document as far as it is complete.
+
+    Returns:
+        The parsed prefix, or None if nothing can be parsed yet
+    """
+    repaired = repair_partial_json(text)
+    if repaired is None:
+        return None
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError:
+        return None
+
+
+class RecipeEventEmitter:
+    """
+    Turns successive partial parses of a recipe into stream events.
+
+    Every top-level field is emitted once, list entries are emitted one by
+    one as soon as they are complete. A list entry that is an object is only
+    considered complete once the next entry (or the next field) has started.
+    """
+
+    def __init__(self):
+        self.emitted_fields = set()
+        self.emitted_counts: Dict[str, int] = {}
+
+    def update(self, partial: Any, final: bool = False) -> List[Tuple[str, Any]]:
+        if not isinstance(partial, dict):
+            return []
+
+        events = []
+        keys = list(partial.keys())
+        for position, key in enumerate(keys):
+            value = partial[key]
+            still_open = not final and position == len(keys) - 1
+
+            if isinstance(value, list):
+                ready = value
+                if still_open and value and isinstance(value[-1], (dict, list)):
+                    ready = value[:-1]
+                start = self.emitted_counts.get(key, 0)
+                event = LIST_EVENTS.get(key, key)
+                for index in range(start, len(ready)):
+                    events.append((event, {"index": index, "value": ready[index]}))
+                self.emitted_counts[key] = max(start, len(ready))
+            elif key not in self.emitted_fields:
+                if still_open and isinstance(value, dict):
+                    continue
+                events.append((key, value))
+                self.emitted_fields.add(key)
+        return events
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Formats one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
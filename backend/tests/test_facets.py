@@ -0,0 +1,76 @@
+import asyncio
+
+import facets
+
+
+class FakeCollection:
+    """Answers the $group aggregation from a dict of counts, counting calls."""
+
+    def __init__(self, counts, delay=0.0):
+        self.counts = counts
+        self.delay = delay
+        self.calls = 0
+
+    def aggregate(self, pipeline):
+        self.calls += 1
+        collection = self
+
+        class Cursor:
+            async def to_list(self, length):
+                await asyncio.sleep(collection.delay)
+                return [{"_id": value, "count": count} for value, count in sorted(collection.counts.items())]
+
+        return Cursor()
+
+
+def test_concurrent_first_requests_compute_once():
+    async def run():
+        service = facets.FacetService(ttl=60)
+        collection = FakeCollection({"Pasta": 2, "Seafood": 1}, delay=0.01)
+        service.attach(collection)
+        snapshots = await asyncio.gather(*(service.get("category", "categories") for _ in range(5)))
+        return collection, snapshots
+
+    collection, snapshots = asyncio.run(run())
+    assert collection.calls == 1
+    assert snapshots[0].values == ["Pasta", "Seafood"] and snapshots[0].counts["Pasta"] == 2
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+def test_stale_snapshot_is_served_while_refreshing_in_background():
+    async def run():
+        service = facets.FacetService(ttl=0)
+        collection = FakeCollection({"Pasta": 2})
+        service.attach(collection)
+        first = await service.get("category", "categories")
+        collection.counts = {"Pasta": 3}
+        # TTL abgelaufen: sofort der alte Snapshot, die Neuberechnung läuft im Hintergrund
+        stale = await service.get("category", "categories")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        current = service._snapshots["category"]
+        return service, first, stale, current
+
+    service, first, stale, current = asyncio.run(run())
+    assert stale is first
+    assert current.counts == {"Pasta": 3} and current.etag != first.etag
+    assert service.stale_hits == 1 and service.refreshes == 2
+
+
+def test_failed_background_refresh_keeps_serving_snapshot():
+    async def run():
+        service = facets.FacetService(ttl=0)
+        collection = FakeCollection({"Greek": 4})
+        service.attach(collection)
+        first = await service.get("area", "areas")
+
+        def broken(pipeline):
+            raise RuntimeError("mongo down")
+
+        collection.aggregate = broken
+        stale = await service.get("area", "areas")
+        await asyncio.sleep(0)
+        return service, first, stale
+
+    service, first, stale = asyncio.run(run())
+    assert stale is first and service.errors == 1
@@ -0,0 +1,51 @@
+import orjson
+import pytest
+from bson import ObjectId
+
+import fast_json
+import recipe_documents
+from models import Recipe
+
+DOCS = [
+    {
+        "title": "Shakshuka",
+        "instructions": ["Zwiebeln anbraten", "Eier stocken lassen"],
+        "ingredients": [{"name": "Eggs", "measure": "4", "normalized": "egg"}],
+        "cookingTime": 25,
+        "servings": 2,
+        "category": "Breakfast",
+        "image": "https://www.themealdb.com/images/media/meals/shakshuka.jpg",
+        "tags": ["Eggs"],
+        "youtube": "https://www.youtube.com/watch?v=abc",
+        "cookingMinutes": 25,
+    },
+    {
+        "title": "Minimal",
+        "instructions": [],
+        "ingredients": [],
+        "youtube": "",
+    },
+    {
+        "title": "Fremder Link",
+        "instructions": ["Kochen"],
+        "ingredients": [{"name": "Rice", "measure": "200g"}],
+        "youtube": "https://example.com/video",
+        "idMeal": "52772",
+    },
+]
+
+
+@pytest.mark.parametrize("doc", DOCS, ids=[doc["title"] for doc in DOCS])
+def test_recipe_payload_matches_response_model(doc):
+    recipe = recipe_documents.prepare_for_response({"_id": ObjectId(), **doc})
+    expected = Recipe(**recipe).model_dump(mode="json", by_alias=True)
+    assert fast_json.recipe_payload(recipe) == expected
+
+
+def test_recipes_response_renders_list_with_headers():
+    recipes = [recipe_documents.prepare_for_response({"_id": ObjectId(), **doc}) for doc in DOCS]
+    response = fast_json.recipes_response(recipes, {"X-Next-Cursor": "abc"})
+    assert response.headers["X-Next-Cursor"] == "abc"
+    body = orjson.loads(response.body)
+    assert [recipe["title"] for recipe in body] == [doc["title"] for doc in DOCS]
+    assert body[1]["tags"] == [] and body[0]["cookingTime"] == "25 Min"
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+import image_cache
+
+
+@pytest.mark.parametrize("max_distance", range(image_cache.MAX_SUPPORTED_DISTANCE + 1))
+def test_hashes_within_max_distance_share_a_band(max_distance):
+    rng = random.Random(max_distance)
+    bands = image_cache.band_count(max_distance)
+    for _ in range(500):
+        phash = rng.getrandbits(64)
+        flipped = phash
+        for bit in rng.sample(range(64), max_distance):
+            flipped ^= 1 << bit
+        assert image_cache.hamming_distance(phash, flipped) == max_distance
+        assert set(image_cache.hash_bands(phash, bands)) & set(image_cache.hash_bands(flipped, bands))
+
+
+def test_bands_cover_all_bits():
+    # Jedes Bit liegt in genau einem Band: ein einzelnes gekipptes Bit ändert genau ein Band
+    for bands in (1, 3, 4, 8):
+        original = image_cache.hash_bands(0, bands)
+        for bit in range(64):
+            changed = image_cache.hash_bands(1 << bit, bands)
+            assert sum(a != b for a, b in zip(original, changed)) == 1
+
+
+def test_default_layout_is_four_16_bit_bands():
+    bands = image_cache.hash_bands(0xFFFF_0000_0000_A7F0, image_cache.band_count(3))
+    assert bands == ["4:0:a7f0", "4:1:0", "4:2:0", "4:3:ffff"]
+
+
+@pytest.mark.parametrize("max_distance", [-1, image_cache.MAX_SUPPORTED_DISTANCE + 1])
+def test_unsupported_distance_is_rejected(max_distance):
+    with pytest.raises(ValueError):
+        image_cache.PerceptualImageCache(max_distance=max_distance)
@@ -0,0 +1,57 @@
+import base64
+import io
+
+from PIL import Image
+
+import image_processing
+
+ORIENTATION = 0x0112
+GPS_IFD = 0x8825
+
+
+def _jpeg_with_exif(size=(200, 100), quality=5) -> str:
+    """
+    Small, heavily compressed JPEG that is rotated via EXIF (orientation 6)
+    and carries GPS data; re-encoding it with IMAGE_QUALITY makes it larger.
+    """
+    image = Image.effect_noise(size, 64).convert("RGB")
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[GPS_IFD] = {1: "N", 2: (52.0, 31.0, 0.0)}
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, exif=exif.tobytes())
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _decode(prepared) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(prepared.data)))
+
+
+def test_small_image_is_still_reencoded_without_metadata():
+    payload = _jpeg_with_exif()
+    prepared = image_processing.prepare_image(payload)
+
+    image = _decode(prepared)
+    assert prepared.data != payload
+    assert prepared.mime_type == "image/jpeg"
+    # Orientierung 6: um 90° gedreht, Breite und Höhe vertauscht
+    assert image.size == (100, 200)
+    assert not image.getexif()
+    assert prepared.processed_bytes >= prepared.original_bytes
+    assert prepared.bytes_saved == 0
+
+
+def test_large_image_is_downscaled():
+    image = Image.effect_noise((2000, 1500), 64).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    prepared = image_processing.prepare_image(base64.b64encode(buffer.getvalue()).decode("ascii"))
+
+    assert max(_decode(prepared).size) == image_processing.IMAGE_MAX_EDGE
+    assert prepared.bytes_saved > 0
+
+
+def test_undecodable_payload_is_passed_through():
+    prepared = image_processing.prepare_image("bm90IGFuIGltYWdl")
+    assert prepared.data == "bm90IGFuIGltYWdl"
+    assert prepared.bytes_saved == 0
@@ -0,0 +1,87 @@
+import asyncio
+import copy
+
+import indexes
+import search
+
+
+def _server_info(spec):
+    """index_information() entry as MongoDB reports it for a declared index."""
+    if spec.is_text:
+        info = {
+            "key": [("_fts", "text"), ("_ftsx", 1)],
+            "weights": dict(spec.options["weights"]),
+            "default_language": spec.options["default_language"],
+            "language_override": "language",
+            "textIndexVersion": 3,
+        }
+    else:
+        info = {"key": list(spec.keys)}
+        info.update(copy.deepcopy(spec.options))
+    return {"v": 2, **info}
+
+
+class FakeCollection:
+    def __init__(self, existing):
+        self.existing = existing
+
+    async def index_information(self):
+        return self.existing
+
+
+def _all_declared():
+    existing = {"_id_": {"v": 2, "key": [("_id", 1)]}}
+    for spec in indexes.RECIPE_INDEXES:
+        existing[spec.name] = _server_info(spec)
+    return existing
+
+
+def _check(existing):
+    collection = FakeCollection(existing)
+    missing = asyncio.run(indexes.missing_indexes(collection))
+    mismatched = asyncio.run(indexes.mismatched_indexes(collection))
+    return missing, mismatched
+
+
+def test_declared_indexes_match_themselves():
+    assert _check(_all_declared()) == ([], [])
+
+
+def test_text_index_with_other_weights_is_reported():
+    existing = _all_declared()
+    # Älterer Textindex unter anderem Namen, ohne Gewichte für area/tags
+    info = existing.pop(search.TEXT_INDEX_NAME)
+    info["weights"] = {"title": 1, "category": 1, "ingredients.name": 1}
+    existing["title_text_category_text"] = info
+
+    missing, mismatched = _check(existing)
+    assert missing == []
+    assert [spec.name for spec, _ in mismatched] == [search.TEXT_INDEX_NAME]
+    assert "weights" in mismatched[0][1]
+
+
+def test_text_index_with_other_language_or_prefix_field_is_reported():
+    existing = _all_declared()
+    existing[search.TEXT_INDEX_NAME]["default_language"] = "german"
+    assert "default_language" in _check(existing)[1][0][1]
+
+    existing = _all_declared()
+    existing[search.TEXT_INDEX_NAME]["key"] = [("category", 1), ("_fts", "text"), ("_ftsx", 1)]
+    assert "key fields" in _check(existing)[1][0][1]
+
+
+def test_same_name_with_other_keys_or_options_is_reported():
+    existing = _all_declared()
+    existing["title_id"]["key"] = [("title", 1)]
+    del existing["generationKey"]["unique"]
+    mismatched = dict((spec.name, difference) for spec, difference in _check(existing)[1])
+    assert set(mismatched) == {"title_id", "generationKey"}
+    assert mismatched["generationKey"].startswith("unique=False")
+
+
+def test_missing_index_is_not_reported_as_mismatch():
+    existing = _all_declared()
+    del existing["category"]
+    missing, mismatched = _check(existing)
+    assert [spec.name for spec in missing] == ["category"]
+    assert mismatched == []
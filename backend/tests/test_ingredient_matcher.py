@@ -0,0 +1,96 @@
+import asyncio
+
+from bson import ObjectId
+
+import ingredient_matcher
+
+
+class FakeCollection:
+    """Minimal async collection: find() iterates over the documents, counting scans."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.scans = 0
+
+    def find(self, query, projection=None):
+        self.scans += 1
+        docs = list(self.docs)
+
+        async def iterate():
+            for doc in docs:
+                yield doc
+
+        return iterate()
+
+
+def _recipe(title, *ingredients, generated=False):
+    doc = {"_id": ObjectId(), "title": title, "ingredients": [{"name": name} for name in ingredients]}
+    if generated:
+        doc["generated"] = True
+    return doc
+
+
+DOCS = [
+    _recipe("Tomato Pasta", "Tomatoes", "Spaghetti", "Olive Oil"),
+    _recipe("Shakshuka", "Eggs", "Tomatoes", "Onion", "Paprika"),
+    _recipe("Aubergine Curry", "Aubergines", "Coconut Milk", "Onion"),
+    _recipe("Generated Pasta", "Tomatoes", "Penne", generated=True),
+]
+
+
+def test_normalize_ingredient_singular_and_synonyms():
+    assert ingredient_matcher.normalize_ingredient("Tomatoes") == "tomato"
+    assert ingredient_matcher.normalize_ingredient("Aubergines") == "eggplant"
+    assert ingredient_matcher.normalize_ingredient("Asparagus") == "asparagus"
+
+
+def test_match_reads_snapshot_loaded_at_start():
+    async def run():
+        collection = FakeCollection(DOCS)
+        matcher = ingredient_matcher.IngredientMatcher(refresh_seconds=3600)
+        await matcher.start(collection)
+        try:
+            matches = matcher.match(["tomato", "pasta"], min_coverage=0.5)
+            matcher.match(["egg"])
+        finally:
+            await matcher.stop()
+        return collection, matcher, matches
+
+    collection, matcher, matches = asyncio.run(run())
+    # Olivenöl zählt als Vorrat: Tomate und Pasta decken "Tomato Pasta" vollständig ab
+    assert {match.title for match in matches if match.coverage == 1.0} == {"Tomato Pasta", "Generated Pasta"}
+    assert collection.scans == 1 and matcher.refreshes == 1
+    assert "generated pasta" not in matcher.catalog_titles
+
+
+def test_background_loop_refreshes_snapshot():
+    async def run():
+        collection = FakeCollection(DOCS[:1])
+        matcher = ingredient_matcher.IngredientMatcher(refresh_seconds=0.01)
+        await matcher.start(collection)
+        before = matcher.match(["onion", "coconut milk", "eggplant"])
+        collection.docs = DOCS
+        await asyncio.sleep(0.05)
+        after = matcher.match(["onion", "coconut milk", "eggplant"])
+        await matcher.stop()
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert before == []
+    assert after[0].title == "Aubergine Curry"
+
+
+def test_failed_initial_load_does_not_abort_start():
+    class BrokenCollection:
+        def find(self, *args):
+            raise RuntimeError("mongo down")
+
+    async def run():
+        matcher = ingredient_matcher.IngredientMatcher(refresh_seconds=3600)
+        await matcher.start(BrokenCollection())
+        result = matcher.match(["tomato"])
+        await matcher.stop()
+        return matcher, result
+
+    matcher, result = asyncio.run(run())
+    assert result == [] and matcher.errors == 1
@@ -0,0 +1,61 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import metrics
+
+
+def _count(histogram, method, route, status) -> float:
+    for metric in histogram.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels == {"method": method, "route": route, "status": status}:
+                return sample.value
+    return 0.0
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(metrics.RequestLatencyMiddleware)
+
+    @app.get("/test-items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/test-stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/test-error")
+    async def error():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_records_route_template_and_status(client):
+    before = _count(metrics.http_request_duration, "GET", "/test-items/{item_id}", "200")
+    assert client.get("/test-items/1").json() == {"id": "1"}
+    client.get("/test-items/2")
+    assert _count(metrics.http_request_duration, "GET", "/test-items/{item_id}", "200") == before + 2
+    assert _count(metrics.http_response_start, "GET", "/test-items/{item_id}", "200") >= 2
+
+
+def test_streaming_response_is_recorded_once_after_last_chunk(client):
+    before = _count(metrics.http_request_duration, "GET", "/test-stream", "200")
+    response = client.get("/test-stream")
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert _count(metrics.http_request_duration, "GET", "/test-stream", "200") == before + 1
+
+
+def test_unmatched_and_failing_requests(client):
+    before_404 = _count(metrics.http_request_duration, "GET", "unmatched", "404")
+    before_500 = _count(metrics.http_request_duration, "GET", "/test-error", "500")
+    assert client.get("/does-not-exist").status_code == 404
+    assert client.get("/test-error").status_code == 500
+    assert _count(metrics.http_request_duration, "GET", "unmatched", "404") == before_404 + 1
+    assert _count(metrics.http_request_duration, "GET", "/test-error", "500") == before_500 + 1
@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+import pagination
+
+
+def _field_matches(value, condition):
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$gt" and not (value is not None and value > operand):
+            return False
+        if op == "$gte" and not (value is not None and value >= operand):
+            return False
+        if op == "$lt" and not (value is not None and value < operand):
+            return False
+        if op == "$ne" and value == operand:
+            return False
+        if op == "$not" and _field_matches(value, operand):
+            return False
+        if op == "$exists" and (value is not None) != operand:
+            return False
+    return True
+
+
+def matches(doc, query):
+    """Minimal MongoDB filter evaluation (missing fields count as null)."""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif not _field_matches(doc.get(key), condition):
+            return False
+    return True
+
+
+def sort_docs(docs, spec):
+    """Sorts like MongoDB: null/missing before numbers in ascending order."""
+    result = list(docs)
+    for field, direction in reversed(spec):
+        result.sort(key=lambda doc: (doc.get(field) is not None, doc.get(field) or 0), reverse=direction == -1)
+    return result
+
+
+def page_through(docs, spec, limit):
+    pages, cursor = [], None
+    while True:
+        candidates = docs
+        if cursor:
+            keyset = pagination.keyset_filter(spec, pagination.decode_cursor(cursor, spec))
+            candidates = [doc for doc in docs if matches(doc, keyset)]
+        page = sort_docs(candidates, spec)[:limit]
+        pages.append(page)
+        cursor = pagination.next_cursor(page, spec, limit)
+        if cursor is None:
+            return [doc["_id"] for page in pages for doc in page]
+
+
+DOCS = [
+    {"_id": 1, "cookingMinutes": 30},
+    {"_id": 2},
+    {"_id": 3, "cookingMinutes": 10},
+    {"_id": 4, "cookingMinutes": None},
+    {"_id": 5, "cookingMinutes": 30},
+    {"_id": 6, "cookingMinutes": 45},
+    {"_id": 7},
+]
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_keyset_pages_reach_null_and_missing_values(direction, limit):
+    spec = pagination.sort_spec(("cookingMinutes", direction))
+    expected = [doc["_id"] for doc in sort_docs(DOCS, spec)]
+    assert page_through(DOCS, spec, limit) == expected
+
+
+def test_descending_sort_uses_descending_tie_breaker():
+    assert pagination.sort_spec(("servingsCount", -1)) == [("servingsCount", -1), ("_id", -1)]
+    assert pagination.sort_spec(("title", 1)) == [("title", 1), ("_id", 1)]
+
+
+def test_cursor_round_trip_and_sort_mismatch():
+    spec = pagination.sort_spec(("title", 1))
+    cursor = pagination.encode_cursor(spec, ["Apple Pie", 7])
+    assert pagination.decode_cursor(cursor, spec) == ["Apple Pie", 7]
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor(cursor, pagination.sort_spec(("title", -1)))
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        pagination.decode_cursor("not-a-cursor", spec)
+
+
+def test_cursor_keeps_object_ids_and_dates():
+    spec = pagination.sort_spec(("created_at", -1))
+    values = [datetime(2024, 5, 1, 12, 30), ObjectId()]
+    assert pagination.decode_cursor(pagination.encode_cursor(spec, values), spec) == values
+
+
+def test_page_stages_with_and_without_cursor():
+    spec = pagination.sort_spec(("title", 1))
+    assert pagination.page_stages(spec, None, 20, 10) == [
+        {"$sort": {"title": 1, "_id": 1}}, {"$skip": 20}, {"$limit": 10},
+    ]
+    cursor = pagination.encode_cursor(spec, ["Apple Pie", ObjectId()])
+    stages = pagination.page_stages(spec, cursor, 20, 10)
+    # Mit Cursor wird skip ignoriert
+    assert list(stages[0]) == ["$match"] and {"$skip": 20} not in stages
+
+
+def test_next_cursor_only_for_full_pages():
+    spec = pagination.sort_spec(("title", 1))
+    docs = [{"_id": ObjectId(), "title": title} for title in ("A", "B")]
+    assert pagination.next_cursor(docs, spec, 3) is None
+    assert pagination.next_cursor([], spec, 3) is None
+    assert pagination.decode_cursor(pagination.next_cursor(docs, spec, 2), spec) == ["B", docs[1]["_id"]]
+
+
+def test_offset_cursor():
+    assert pagination.offset_cursor(30, 30) is None
+    assert pagination.decode_offset_cursor(pagination.offset_cursor(10, 30)) == 10
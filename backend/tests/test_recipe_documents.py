@@ -0,0 +1,48 @@
+import pytest
+
+import recipe_documents
+
+
+@pytest.mark.parametrize("value, minutes", [
+    # Formate der Beispieldaten (TheMealDB, seed) und der LLM-Antworten
+    (30, 30),
+    (12.5, 12),
+    ("30", 30),
+    ("30 Min", 30),
+    ("45 minutes", 45),
+    ("15m", 15),
+    ("2 hours", 120),
+    ("2 hrs", 120),
+    ("1,5 h", 90),
+    ("1.5 hrs", 90),
+    ("1 hour 20 minutes", 80),
+    ("1 hr 15 min", 75),
+    ("1 hour and 15 minutes", 75),
+    ("1h30", 90),
+    ("1hr15", 75),
+    ("1h 30m", 90),
+    ("1 Std. 10 Min.", 70),
+    ("PT1H30M", 90),
+    ("30-40 min", 30),
+    ("ca. 20 Min", 20),
+])
+def test_parse_minutes(value, minutes):
+    assert recipe_documents.parse_minutes(value) == minutes
+
+
+@pytest.mark.parametrize("value", [None, True, "", "schnell"])
+def test_parse_minutes_without_number(value):
+    assert recipe_documents.parse_minutes(value) is None
+
+
+@pytest.mark.parametrize("value, servings", [(4, 4), ("4 servings", 4), ("2-4", 2), ("Serves 6", 6), ("viele", None)])
+def test_parse_servings(value, servings):
+    assert recipe_documents.parse_servings(value) == servings
+
+
+def test_normalized_fields_keep_display_strings():
+    fields = recipe_documents.normalized_fields({"cookingTime": "1h30", "servings": "4 servings"})
+    assert fields == {"schemaVersion": recipe_documents.SCHEMA_VERSION, "cookingMinutes": 90, "servingsCount": 4}
+
+    fields = recipe_documents.normalized_fields({"cookingTime": 25, "servings": 2})
+    assert fields["cookingTime"] == "25 Min" and fields["servings"] == "2 servings"
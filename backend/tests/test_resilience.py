@@ -0,0 +1,213 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+import resilience
+
+REQUEST = httpx.Request("POST", "https://llm.invalid/chat/completions")
+
+
+def _status_error(status: int) -> openai.APIStatusError:
+    response = httpx.Response(status, request=REQUEST)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+TRANSIENT = asyncio.TimeoutError()
+NON_TRANSIENT = _status_error(400)
+
+
+@pytest.mark.parametrize("error, transient", [
+    (asyncio.TimeoutError(), True),
+    (openai.APIConnectionError(request=REQUEST), True),
+    (_status_error(429), True),
+    (_status_error(503), True),
+    (_status_error(408), True),
+    (_status_error(400), False),
+    (_status_error(401), False),
+    (ValueError("kaputtes JSON"), False),
+])
+def test_is_transient(error, transient):
+    assert resilience.is_transient(error) is transient
+
+
+def _failed_call(breaker, error):
+    breaker.before_call()
+    breaker.record_failure(error)
+
+
+def test_breaker_opens_after_threshold_of_consecutive_failures():
+    breaker = resilience.CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    for _ in range(2):
+        _failed_call(breaker, TRANSIENT)
+    assert breaker.state == resilience.CLOSED and breaker.consecutive_failures == 2
+
+    _failed_call(breaker, TRANSIENT)
+    assert breaker.state == resilience.OPEN and breaker.opened == 1
+    with pytest.raises(resilience.CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_success_resets_failure_count():
+    breaker = resilience.CircuitBreaker(failure_threshold=3)
+    _failed_call(breaker, TRANSIENT)
+    _failed_call(breaker, TRANSIENT)
+    breaker.before_call()
+    breaker.record_success()
+    _failed_call(breaker, TRANSIENT)
+    assert breaker.state == resilience.CLOSED and breaker.consecutive_failures == 1
+
+
+def test_non_transient_error_breaks_failure_streak():
+    breaker = resilience.CircuitBreaker(failure_threshold=3)
+    _failed_call(breaker, TRANSIENT)
+    _failed_call(breaker, TRANSIENT)
+    # Das LLM hat geantwortet: keine Fehlerserie mehr
+    _failed_call(breaker, NON_TRANSIENT)
+    assert breaker.consecutive_failures == 0
+    _failed_call(breaker, TRANSIENT)
+    _failed_call(breaker, TRANSIENT)
+    assert breaker.state == resilience.CLOSED
+
+
+def test_deadline_exceeded_does_not_count():
+    breaker = resilience.CircuitBreaker(failure_threshold=1)
+    _failed_call(breaker, resilience.DeadlineExceeded())
+    assert breaker.state == resilience.CLOSED and breaker.consecutive_failures == 0
+
+
+def _open_breaker(monkeypatch, now):
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = resilience.CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    _failed_call(breaker, TRANSIENT)
+    assert breaker.state == resilience.OPEN
+    now[0] += 30
+    return breaker
+
+
+def test_half_open_allows_single_trial_and_closes_on_success(monkeypatch):
+    now = [1000.0]
+    breaker = _open_breaker(monkeypatch, now)
+
+    breaker.before_call()
+    assert breaker.state == resilience.HALF_OPEN
+    with pytest.raises(resilience.CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED and breaker.consecutive_failures == 0
+    breaker.before_call()
+
+
+def test_half_open_reopens_on_transient_failure(monkeypatch):
+    now = [1000.0]
+    breaker = _open_breaker(monkeypatch, now)
+
+    _failed_call(breaker, TRANSIENT)
+    assert breaker.state == resilience.OPEN and breaker.opened == 2
+    with pytest.raises(resilience.CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_closes_on_non_transient_failure(monkeypatch):
+    now = [1000.0]
+    breaker = _open_breaker(monkeypatch, now)
+
+    _failed_call(breaker, NON_TRANSIENT)
+    assert breaker.state == resilience.CLOSED and breaker.consecutive_failures == 0
+
+
+def test_cancelled_trial_releases_half_open_slot(monkeypatch):
+    now = [1000.0]
+    breaker = _open_breaker(monkeypatch, now)
+
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == resilience.HALF_OPEN
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(resilience, "LLM_RETRY_MAX_SECONDS", 0.001)
+
+
+def test_policy_retries_transient_errors(fast_retries):
+    breaker = resilience.CircuitBreaker(failure_threshold=10)
+    policy = resilience.ResiliencePolicy(breaker, attempts=3)
+    attempts = []
+
+    async def attempt(deadline):
+        attempts.append(deadline)
+        if len(attempts) < 3:
+            raise asyncio.TimeoutError()
+        return "ok"
+
+    assert asyncio.run(policy.call("generate_recipes", attempt)) == "ok"
+    assert len(attempts) == 3 and policy.retries == 2 and policy.failures == 0
+    assert breaker.consecutive_failures == 0
+
+
+def test_policy_does_not_retry_non_transient_errors(fast_retries):
+    policy = resilience.ResiliencePolicy(resilience.CircuitBreaker(), attempts=3)
+    calls = []
+
+    async def attempt(deadline):
+        calls.append(deadline)
+        raise NON_TRANSIENT
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(policy.call("generate_recipes", attempt))
+    assert len(calls) == 1 and policy.failures == 1
+
+
+def test_policy_stream_retries_only_before_first_chunk(fast_retries):
+    policy = resilience.ResiliencePolicy(resilience.CircuitBreaker(failure_threshold=10), attempts=3)
+    starts = []
+
+    def attempt(deadline):
+        starts.append(deadline)
+
+        async def chunks():
+            if len(starts) == 1:
+                raise asyncio.TimeoutError()
+            yield "a"
+            yield "b"
+            raise asyncio.TimeoutError()
+
+        return chunks()
+
+    async def run():
+        received = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for chunk in policy.stream("stream_recipe_details", attempt):
+                received.append(chunk)
+        return received
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert len(starts) == 2 and policy.retries == 1 and policy.failures == 1
+
+
+def test_fallbacks_use_first_provider_with_result():
+    fallbacks = resilience.Fallbacks()
+
+    async def broken(*args):
+        raise RuntimeError("db down")
+
+    async def empty(*args):
+        return None
+
+    async def titles(ingredients):
+        return ["Shakshuka"]
+
+    for provider in (broken, empty, titles):
+        fallbacks.register("generate_recipes", provider)
+
+    assert asyncio.run(fallbacks.get("generate_recipes", ["egg"])) == ["Shakshuka"]
+    assert asyncio.run(fallbacks.get("analyze_images", [])) is None
+    assert fallbacks.stats() == {
+        "fallbacks_served": {"generate_recipes": 1},
+        "fallbacks_missed": {"analyze_images": 1},
+    }
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_with_same_key_share_one_execution():
+    async def run():
+        flights = SingleFlight()
+        started = []
+
+        async def call():
+            started.append(1)
+            await asyncio.sleep(0.01)
+            return {"titles": ["Shakshuka"]}
+
+        results = await asyncio.gather(*(flights.do("k", call) for _ in range(4)))
+        return flights, started, results
+
+    flights, started, results = asyncio.run(run())
+    assert len(started) == 1
+    assert all(result == {"titles": ["Shakshuka"]} for result in results)
+    # Wartende Aufrufer bekommen Kopien, Änderungen wirken nicht auf die anderen
+    results[1]["titles"].append("Pasta")
+    assert results[2] == {"titles": ["Shakshuka"]}
+    assert flights.stats() == {"in_flight": 0, "calls": 1, "coalesced": 3, "coalesced_ratio": 0.75}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    async def run():
+        flights = SingleFlight()
+        counter = []
+
+        async def call():
+            counter.append(1)
+            await asyncio.sleep(0)
+            return len(counter)
+
+        await asyncio.gather(flights.do("a", call), flights.do("b", call))
+        # Ein abgeschlossener Aufruf wird nicht zwischengespeichert
+        await flights.do("a", call)
+        return flights, counter
+
+    flights, counter = asyncio.run(run())
+    assert len(counter) == 3 and flights.calls == 3 and flights.coalesced == 0
+
+
+def test_exception_is_shared_by_all_waiters():
+    async def run():
+        flights = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.01)
+            raise ValueError("LLM-Antwort unbrauchbar")
+
+        return await asyncio.gather(*(flights.do("k", call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_call_for_others():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "fertig"
+
+        first = asyncio.create_task(flights.do("k", call))
+        second = asyncio.create_task(flights.do("k", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, flights
+
+    result, flights = asyncio.run(run())
+    assert result == "fertig" and flights.stats()["in_flight"] == 0
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import streaming
+
+DOCUMENT = json.dumps({
+    "title": "Shakshuka",
+    "servings": "2",
+    "ingredients": [{"name": "Eggs", "measure": "4"}, {"name": "Tomatoes", "measure": "400g"}],
+    "instructions": ["Zwiebeln anbraten", "Eier \"stocken\" lassen"],
+    "tips": "Mit Brot servieren",
+})
+
+
+@pytest.mark.parametrize("text, repaired", [
+    ("", None),
+    ("Hier ist das Rezept:", None),
+    ('```json\n{"title": "Shak', "{}"),
+    ('{"title": "Shakshuka", "serv', '{"title": "Shakshuka"}'),
+    ('{"title": "Shakshuka", "servings":', '{"title": "Shakshuka"}'),
+    ('{"steps": ["a", "b', '{"steps": ["a"]}'),
+    ('{"items": [{"name": "Eggs"}, {"na', '{"items": [{"name": "Eggs"}, {}]}'),
+    ('{"a": {"b": [1, 2', '{"a": {"b": [1]}}'),
+    ('{"done": true} trailing', '{"done": true}'),
+])
+def test_repair_partial_json(text, repaired):
+    assert streaming.repair_partial_json(text) == repaired
+
+
+def test_every_prefix_parses_to_a_prefix_of_the_document():
+    full = json.loads(DOCUMENT)
+    for end in range(len(DOCUMENT) + 1):
+        partial = streaming.parse_partial_json(DOCUMENT[:end])
+        if partial is None:
+            continue
+        assert isinstance(partial, dict)
+        assert list(partial) == list(full)[:len(partial)]
+    assert streaming.parse_partial_json(DOCUMENT) == full
+
+
+def test_emitter_emits_each_field_and_list_entry_once():
+    emitter = streaming.RecipeEventEmitter()
+    events = []
+    for end in range(1, len(DOCUMENT) + 1):
+        partial = streaming.parse_partial_json(DOCUMENT[:end])
+        if partial is not None:
+            events.extend(emitter.update(partial))
+    events.extend(emitter.update(json.loads(DOCUMENT), final=True))
+
+    assert events == [
+        ("title", "Shakshuka"),
+        ("servings", "2"),
+        ("ingredient", {"index": 0, "value": {"name": "Eggs", "measure": "4"}}),
+        ("ingredient", {"index": 1, "value": {"name": "Tomatoes", "measure": "400g"}}),
+        ("instruction", {"index": 0, "value": "Zwiebeln anbraten"}),
+        ("instruction", {"index": 1, "value": 'Eier "stocken" lassen'}),
+        ("tips", "Mit Brot servieren"),
+    ]
+
+
+def test_emitter_holds_back_open_object_entries():
+    emitter = streaming.RecipeEventEmitter()
+    # Das letzte Objekt kann noch wachsen ("measure" fehlt noch)
+    assert emitter.update({"ingredients": [{"name": "Eggs"}]}) == []
+    assert emitter.update({"ingredients": [{"name": "Eggs"}]}, final=True) == [
+        ("ingredient", {"index": 0, "value": {"name": "Eggs"}}),
+    ]
+    assert emitter.update(["not", "a", "dict"]) == []
+
+
+def test_format_sse():
+    assert streaming.format_sse("title", "Crème brûlée") == 'event: title\ndata: "Crème brûlée"\n\n'
+    assert streaming.format_sse("done", {"ok": True}) == 'event: done\ndata: {"ok": true}\n\n'